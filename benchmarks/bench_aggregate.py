@@ -0,0 +1,36 @@
+"""Count and sum per category with Table.aggregate against a loop over
+Table.all() that builds the dicts by hand.
+
+    python benchmarks/bench_aggregate.py [n_rows]
+"""
+import sys
+import time
+
+from pymemdb import Table
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    table = Table()
+    table.create_column("amount", typecode="d", index=False)
+    table.insert_many({"category": i % 50, "amount": float(i)}
+                      for i in range(n_rows))
+
+    start = time.perf_counter()
+    counts: dict = {}
+    sums: dict = {}
+    for row in table.all():
+        counts[row["category"]] = counts.get(row["category"], 0) + 1
+        sums[row["category"]] = sums.get(row["category"], 0) + row["amount"]
+    print(f"loop over all(), count + sum: {time.perf_counter() - start:.2f} s")
+
+    for kwargs in [{"count": True}, {"count": True, "sum": "amount"},
+                   {"count": True, "sum": "amount", "where": {"category": {"lt": 5}}}]:
+        start = time.perf_counter()
+        table.aggregate(group_by="category", **kwargs)
+        print(f"aggregate({kwargs}): {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Searches on two columns and insert_ignore with and without a composite
+index on them.
+
+    python benchmarks/bench_composite_index.py [n_rows]
+"""
+import sys
+import time
+
+from pymemdb import Table
+
+
+def build(n_rows, composite):
+    table = Table()
+    if composite:
+        table.insert({"user": -1, "day": -1})
+        table.create_index(["user", "day"], unique=True)
+    start = time.perf_counter()
+    table.insert_many({"user": i % 1000, "day": i // 1000}
+                      for i in range(n_rows))
+    print(f"insert_many: {time.perf_counter() - start:.2f} s")
+    return table
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_days = n_rows // 1000
+
+    for composite in [False, True]:
+        print("composite index" if composite else "column indexes only")
+        table = build(n_rows, composite)
+
+        start = time.perf_counter()
+        for i in range(10000):
+            table.count(user=i % 1000, day=i % n_days)
+        print(f"10k count(user, day): {time.perf_counter() - start:.3f} s")
+
+        start = time.perf_counter()
+        for i in range(10000):
+            table.insert_ignore({"user": i % 1000, "day": i % (n_days + 5)},
+                                keys=["user", "day"])
+        print(f"10k insert_ignore: {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""N reader threads search and scan a thread-safe table while M writer
+threads insert into it.
+
+    python benchmarks/bench_contention.py [n_readers] [n_writers] [seconds]
+"""
+import sys
+import threading
+import time
+
+from pymemdb import Table
+
+
+def main():
+    n_readers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n_writers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 3.0
+
+    table = Table(thread_safe=True)
+    table.create_column("kind", sorted_index=True)
+    table.insert_many({"kind": i % 100, "payload": i} for i in range(100_000))
+    stop = threading.Event()
+    counts = {"find": 0, "scan": 0, "insert": 0}
+    lock = threading.Lock()
+
+    def read(n: int) -> None:
+        finds = scans = 0
+        while not stop.is_set():
+            list(table.find(kind=n % 100))
+            finds += 1
+            if finds % 100 == 0:
+                list(table.all(limit=10_000))
+                scans += 1
+        with lock:
+            counts["find"] += finds
+            counts["scan"] += scans
+
+    def write(n: int) -> None:
+        inserts = 0
+        while not stop.is_set():
+            table.insert({"kind": inserts % 100, "payload": -n})
+            inserts += 1
+        with lock:
+            counts["insert"] += inserts
+
+    threads = [threading.Thread(target=read, args=(n,)) for n in range(n_readers)]
+    threads += [threading.Thread(target=write, args=(n,)) for n in range(n_writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"{n_readers} readers, {n_writers} writers, {seconds:.0f} s: "
+          + ", ".join(f"{op} {count / seconds:,.0f}/s"
+                      for op, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Counting matching rows with Table.count against len(list(Table.find())),
+and the cost of keeping value counts on an unindexed column.
+
+    python benchmarks/bench_count.py [n_rows]
+"""
+import sys
+import time
+
+from pymemdb import Table
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    table = Table()
+    table.create_column("code", index=False, counts=True)
+    start = time.perf_counter()
+    table.insert_many({"status": f"s{i % 10}", "code": i % 1000}
+                      for i in range(n_rows))
+    print(f"insert_many: {time.perf_counter() - start:.2f} s")
+
+    searches = [{"status": "s3"}, {"code": 7},
+                {"status": "s3", "code": {"lt": 100}}]
+    for where in searches:
+        start = time.perf_counter()
+        n_found = len(list(table.find(**where)))
+        find_time = time.perf_counter() - start
+        start = time.perf_counter()
+        n_counted = table.count(**where)
+        count_time = time.perf_counter() - start
+        assert n_found == n_counted
+        print(f"{where}: len(list(find)) {find_time:.3f} s, "
+              f"count {count_time:.6f} s")
+
+    # the first call computes min and max from the distinct values, later
+    # calls read the maintained bounds
+    for attempt in ["first", "second"]:
+        start = time.perf_counter()
+        for col in table.columns:
+            table.stats(col)
+        print(f"stats of all columns, {attempt} call: "
+              f"{time.perf_counter() - start:.6f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Import time of pymemdb, measured with 'python -X importtime' in fresh
+interpreters. dataset and SQLAlchemy must not be imported.
+
+    python benchmarks/bench_import_time.py [n_runs]
+"""
+import re
+import subprocess
+import sys
+
+
+def import_time(module: str) -> int:
+    """Cumulative import time of 'module' in microseconds."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             f"import {module}"], capture_output=True,
+                            text=True, check=True).stderr
+    for line in stderr.splitlines():
+        match = re.match(rf"import time:\s+\d+ \|\s+(\d+) \| {module}$", line)
+        if match:
+            return int(match.group(1))
+    raise RuntimeError(f"{module} not found in importtime output")
+
+
+def main():
+    n_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    for module in ["pymemdb", "dataset"]:
+        times = sorted(import_time(module) for _ in range(n_runs))
+        print(f"import {module}: median {times[n_runs // 2] / 1000:.1f} ms, "
+              f"min {times[0] / 1000:.1f} ms")
+
+    loaded = subprocess.run([sys.executable, "-c",
+                             "import sys, pymemdb; print(sorted({m.split('.')[0] "
+                             "for m in sys.modules} & {'dataset', 'sqlalchemy'}))"],
+                            capture_output=True, text=True, check=True).stdout
+    print(f"heavy modules imported by pymemdb: {loaded.strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Bulk loading with Table.insert_many against a loop over Table.insert,
+both into a table with the default inverted indexes. insert_many leaves
+the inverted indexes of columns without unique constraint or sorted index
+to the first search, which is timed separately.
+
+    python benchmarks/bench_insert.py [n_rows]
+"""
+import sys
+import time
+
+from pymemdb import Table
+
+
+def rows(n_rows):
+    return [{"name": f"name {i}", "age": i % 90, "city": f"city {i % 1000}",
+             "score": i / 7, "active": i % 3 == 0} for i in range(n_rows)]
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    data = rows(n_rows)
+
+    table = Table()
+    start = time.perf_counter()
+    for row in data:
+        table.insert(row)
+    single = time.perf_counter() - start
+
+    table = Table()
+    start = time.perf_counter()
+    table.insert_many(data)
+    bulk = time.perf_counter() - start
+    start = time.perf_counter()
+    for col in data[0]:
+        table.count(**{col: data[0][col]})
+    first = time.perf_counter() - start
+
+    print(f"{n_rows} rows: insert {single:.2f} s, insert_many {bulk:.2f} s "
+          f"({single / bulk:.1f}x), first search per column {first:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
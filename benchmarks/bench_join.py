@@ -0,0 +1,41 @@
+"""Enrich orders with customer data: Database.join against the loop over
+all() and find_one it replaces.
+
+    python benchmarks/bench_join.py [n_orders] [n_customers]
+"""
+import sys
+import time
+
+from pymemdb import Database
+
+
+def main():
+    n_orders = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_customers = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    db = Database()
+    db["customers"].insert_many({"name": f"customer {i}", "segment": i % 7}
+                                for i in range(n_customers))
+    db["orders"].insert_many({"customer": i % n_customers + 1, "amount": i}
+                             for i in range(n_orders))
+
+    start = time.perf_counter()
+    n_rows = sum(1 for _ in db.join("orders", "customers", on=("customer", "id"),
+                                    columns=["amount", "name", "segment"]))
+    print(f"join {n_orders} x {n_customers}: {n_rows} rows in "
+          f"{time.perf_counter() - start:.2f} s")
+
+    n_loop = min(n_orders, 100_000)
+    start = time.perf_counter()
+    customers = db["customers"]
+    for order in db["orders"].all(limit=n_loop):
+        customer = customers.find_one(id=order["customer"])
+        {"amount": order["amount"], "name": customer["name"],
+         "segment": customer["segment"]}
+    elapsed = time.perf_counter() - start
+    print(f"all() + find_one for {n_loop} orders: {elapsed:.2f} s "
+          f"(~{elapsed * n_orders / n_loop:.1f} s for {n_orders})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Memory footprint of a wide table with and without inverted indexes.
+
+    python benchmarks/bench_memory.py [n_rows] [n_columns]
+"""
+import sys
+import tracemalloc
+
+from pymemdb import Table
+
+
+def rows(n_rows, n_columns):
+    for i in range(n_rows):
+        yield {f"col{c}": f"free text {i} in column {c}"
+               for c in range(n_columns)}
+
+
+def measure(n_rows, n_columns, index):
+    tracemalloc.start()
+    table = Table(index=index)
+    table.insert_many(rows(n_rows, n_columns))
+    # insert_many leaves the inverted indexes to the first search
+    for col in table.columns:
+        table[col].values
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n_columns = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    for index in (True, False):
+        size = measure(n_rows, n_columns, index)
+        print(f"index={index!s:5} rows={n_rows} columns={n_columns} "
+              f"memory={size / 2**20:,.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Primary key allocation with mixed explicit and automatic ids.
+
+    python benchmarks/bench_pk_allocation.py [n_rows]
+"""
+import sys
+import time
+
+from pymemdb import Table
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    table = Table()
+    table.insert_many({"id": i, "a": i} for i in range(1, n_rows + 1))
+    start = time.perf_counter()
+    table.insert({"a": 0})
+    print(f"first auto id after {n_rows} explicit ids: "
+          f"{(time.perf_counter() - start) * 1000:.3f} ms")
+
+    table = Table()
+    start = time.perf_counter()
+    for i in range(n_rows // 2):
+        table.insert({"id": 2 * i + 10, "a": i})
+        table.insert({"a": i})
+    print(f"{n_rows} alternating explicit/auto inserts: "
+          f"{time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Warm restart of a table with numeric columns: bulk insert vs. loading a
+snapshot with and without memory mapping.
+
+    python benchmarks/bench_snapshot.py [n_rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from pymemdb import Database
+
+
+def build(n_rows: int) -> Database:
+    db = Database()
+    table = db.create_table("measurements")
+    table.create_column("sensor", typecode="q", index=False)
+    table.create_column("value", typecode="d", index=False)
+    table.insert_many({"sensor": i % 1000, "value": i * 0.5}
+                      for i in range(n_rows))
+    return db
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    start = time.perf_counter()
+    db = build(n_rows)
+    print(f"insert_many {n_rows} rows: {time.perf_counter() - start:.2f} s")
+
+    path = os.path.join(tempfile.mkdtemp(), "db.snapshot")
+    for indexes in [True, False]:
+        start = time.perf_counter()
+        db.save(path, indexes=indexes)
+        print(f"save (indexes={indexes}): {time.perf_counter() - start:.2f} s, "
+              f"{os.path.getsize(path) / 2**20:.0f} MiB")
+        for mmap in [True, False]:
+            start = time.perf_counter()
+            Database.load(path, mmap=mmap)
+            print(f"  load (mmap={mmap}): {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
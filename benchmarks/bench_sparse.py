@@ -0,0 +1,58 @@
+"""Inserts into a wide, sparse table: every row sets 2 of many columns.
+Reports the insert time, the traced memory of the table and the peak RSS
+of the process, so run one method per process.
+
+    python benchmarks/bench_sparse.py [n_rows] [n_columns] [insert|insert_many]
+"""
+import resource
+import sys
+import time
+import tracemalloc
+
+from pymemdb import Table
+
+
+def rows(n_rows, n_columns):
+    for i in range(n_rows):
+        yield {f"col{i % n_columns}": i, f"col{(i + 1) % n_columns}": -i}
+
+
+def load(n_rows, n_columns, method):
+    table = Table()
+    for c in range(n_columns):
+        table.create_column(f"col{c}")
+    if method == "insert":
+        for row in rows(n_rows, n_columns):
+            table.insert(row)
+    else:
+        table.insert_many(rows(n_rows, n_columns))
+    return table
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_columns = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    method = sys.argv[3] if len(sys.argv) > 3 else "insert"
+
+    start = time.perf_counter()
+    table = load(n_rows, n_columns, method)
+    elapsed = time.perf_counter() - start
+    # peak RSS of the timed load, in KiB on Linux
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    del table
+
+    tracemalloc.start()
+    table = load(n_rows, n_columns, method)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    n_found = len(list(table.find(col0=None, col1=None)))
+    find_time = time.perf_counter() - start
+
+    print(f"{method}: rows={n_rows} columns={n_columns} {elapsed:.2f} s "
+          f"memory={size / 2**20:,.0f} MiB peak RSS={rss / 2**10:,.0f} MiB, "
+          f"find(col0=None, col1=None) {n_found} rows in {find_time:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
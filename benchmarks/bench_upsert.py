@@ -0,0 +1,62 @@
+"""Deduplicating ingest: find_one followed by update or insert against
+Table.upsert and Table.upsert_many. Half of the ingested rows exist.
+
+    python benchmarks/bench_upsert.py [n_rows]
+"""
+import sys
+import time
+
+from pymemdb import Table
+
+
+def build(n_rows, composite):
+    table = Table()
+    table.insert_many({"user": i % 1000, "day": i // 1000, "n": 0}
+                      for i in range(n_rows))
+    if composite:
+        table.create_index(["user", "day"], unique=True)
+    return table
+
+
+def ingest(n_rows):
+    # the second half of the days is new
+    offset = n_rows // 2000
+    return [{"user": i % 1000, "day": offset + i // 1000, "n": i}
+            for i in range(n_rows)]
+
+
+def emulated(table, rows):
+    for row in rows:
+        found = table.find_one(user=row["user"], day=row["day"])
+        if found is None:
+            table.insert(row)
+        else:
+            table.update({"id": found["id"]}, n=row["n"])
+
+
+def one_by_one(table, rows):
+    for row in rows:
+        table.upsert(row, keys=["user", "day"])
+
+
+def bulk(table, rows):
+    table.upsert_many(rows, keys=["user", "day"])
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = ingest(n_rows)
+    for composite in [False, True]:
+        print("composite index" if composite else "column indexes only")
+        results = []
+        for func in [emulated, one_by_one, bulk]:
+            table = build(n_rows, composite)
+            start = time.perf_counter()
+            func(table, rows)
+            print(f"{func.__name__}: {time.perf_counter() - start:.2f} s")
+            results.append(list(table.all()))
+        assert results[0] == results[1] == results[2]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Cost of the write-ahead log for single-row inserts per sync mode, and
+time to reopen a database by replaying its log.
+
+    python benchmarks/bench_wal.py [n_rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from pymemdb import Database
+
+
+def insert_rows(db: Database, n_rows: int) -> float:
+    table = db["events"]
+    start = time.perf_counter()
+    for i in range(n_rows):
+        table.insert({"kind": i % 10, "payload": f"event {i}"})
+    db.commit()
+    return time.perf_counter() - start
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print(f"no log: {insert_rows(Database(), n_rows):.2f} s for {n_rows} inserts")
+    for sync, rows in [("never", n_rows), ("batch", n_rows),
+                       ("always", n_rows // 100)]:
+        path = os.path.join(tempfile.mkdtemp(), "db.snapshot")
+        db = Database.open(path, sync=sync)
+        elapsed = insert_rows(db, rows)
+        db.close()
+        print(f"sync={sync}: {elapsed:.2f} s for {rows} inserts")
+
+
+    path = os.path.join(tempfile.mkdtemp(), "db.snapshot")
+    db = Database.open(path)
+    insert_rows(db, n_rows)
+    db.close()
+    start = time.perf_counter()
+    Database.open(path)
+    print(f"replay {n_rows} records: {time.perf_counter() - start:.2f} s")
+    start = time.perf_counter()
+    Database.open(path).compact().join()
+    print(f"compaction: {time.perf_counter() - start:.2f} s")
+    start = time.perf_counter()
+    Database.open(path)
+    print(f"open after compaction: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
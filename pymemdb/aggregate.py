@@ -0,0 +1,90 @@
+"""Group-by and aggregation over the column stores of a table."""
+
+from collections import Counter
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .column import Column
+
+AGGREGATE = Callable[[Sequence], Hashable]
+
+
+def _non_null(values: Sequence) -> Sequence:
+    # arrays can not hold None, 'in' on a list runs in C
+    if not isinstance(values, list) or None not in values:
+        return values
+    return [val for val in values if val is not None]
+
+
+def _sum(values: Sequence) -> Hashable:
+    values = _non_null(values)
+    return sum(values) if len(values) else None
+
+
+def _min(values: Sequence) -> Hashable:
+    values = _non_null(values)
+    return min(values) if len(values) else None
+
+
+def _max(values: Sequence) -> Hashable:
+    values = _non_null(values)
+    return max(values) if len(values) else None
+
+
+def _mean(values: Sequence) -> Hashable:
+    values = _non_null(values)
+    return sum(values) / len(values) if len(values) else None
+
+
+AGGREGATES: Dict[str, AGGREGATE] = {"sum": _sum, "min": _min, "max": _max,
+                                    "mean": _mean}
+
+
+def value_counts(column: Column, pks: Optional[set] = None) -> Counter:
+    """Counts the rows per value of 'column', only among 'pks' if given.
+       Without 'pks' the counts come from the histogram of the column."""
+    if pks is None:
+        return Counter(column.histogram())
+    return Counter(column.take(list(pks)))
+
+
+def groups(columns: List[Column], pks: Optional[set],
+           all_pks: set) -> Dict[tuple, List]:
+    """Maps the values of 'columns' to the primary keys of the rows that
+       hold them, among 'pks' or all rows if None."""
+    if len(columns) == 1 and columns[0].index and pks is None:
+        column = columns[0]
+        grouped = {(val,): list(owners) for val, owners in column.values.items()}
+        if column.n_missing:
+            grouped.setdefault((column.default,), []).extend(column.missing)
+        return grouped
+    pk_list = list(all_pks if pks is None else pks)
+    grouped: Dict[tuple, List] = {}
+    keys = zip(*[column.take(pk_list) for column in columns])
+    for pk, key in zip(pk_list, keys):
+        grouped.setdefault(key, []).append(pk)
+    return grouped
+
+
+def aggregate(table, group_by: List[str], count: bool,
+              aggregates: List[Tuple[str, str]],
+              pks: Optional[set]) -> List[dict]:
+    """Computes 'aggregates', a list of (function, column) tuples, per group
+       of 'group_by' over the rows 'pks' or all rows if None."""
+    if count and not aggregates and len(group_by) == 1:
+        counts = value_counts(table[group_by[0]], pks)
+        return [{group_by[0]: val, "count": n} for val, n in counts.items()]
+
+    if group_by:
+        grouped = groups([table[col] for col in group_by], pks, table.keys)
+    else:
+        grouped = {(): list(table.keys if pks is None else pks)}
+    results = []
+    for key, group_pks in grouped.items():
+        result = dict(zip(group_by, key))
+        if count:
+            result["count"] = len(group_pks)
+        for func, col in aggregates:
+            values = table[col].take(group_pks)
+            result[f"{func}_{col}"] = AGGREGATES[func](values)
+        results.append(result)
+    return results
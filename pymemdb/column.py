@@ -1,37 +1,544 @@
-from typing import Hashable, Set
+from typing import (Dict, Generator, Hashable, List, Optional, Set,
+                    Sequence, Tuple)
 
-from collections import defaultdict
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from contextlib import contextmanager
+from itertools import repeat
+import gc
 from .errors import UniqueConstraintError
+from .query import BOUNDS, in_range, parse_operators
+from .storage import ArrayCells, SparseKeyError
+
+_NOTHING = object()
+# bounds of a column whose values can not be compared with each other
+_UNORDERABLE = (None, None)
+
+
+@contextmanager
+def _gc_paused() -> Generator[None, None, None]:
+    """Bulk loads allocate millions of containers that all survive, so the
+       cyclic garbage collector only burns time while they are created."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
 
 
 class Column:
 
-    def __init__(self, default: Hashable = None, unique: bool = False):
-        self.cells: dict = dict()
-        self.values: defaultdict = defaultdict(set)
+    def __init__(self, default: Hashable = None, unique: bool = False,
+                 index: bool = True, typecode: Optional[str] = None,
+                 sorted_index: bool = False, counts: bool = False):
+        self.cells: dict = dict() if typecode is None else ArrayCells(typecode)
         self.default = default
         self.unique = unique
+        # unique constraints and the sorted index build on the inverted index
+        self.index = index or unique or sorted_index
+        self._values: defaultdict = defaultdict(set)
+        # (pks, vals) chunks written by insert_many that are not in the
+        # inverted index yet, see values
+        self._pending: List[Tuple[Sequence[int], Sequence[Hashable]]] = []
+        # distinct values of the column except None in ascending order
+        self.sorted_values: Optional[list] = [] if sorted_index else None
+        # primary keys of all rows of the table, set by Table. Rows without
+        # a cell are derived from them, see missing
+        self.keys: Optional[set] = None
+        self._missing: Optional[set] = None
+        self._missing_stamp = 0
+        # number of cells per value of unindexed columns if requested, one
+        # entry per distinct value. Indexed columns count the primary keys
+        # in their inverted index instead
+        self.counts: Optional[Counter] = (
+            Counter() if counts and not self.index else None)
+        # (min, max) of the cell values except None, () if there is none and
+        # None if it has to be computed from the distinct values first
+        self._bounds: Optional[tuple] = None
+
+    @property
+    def values(self) -> defaultdict:
+        """Returns the inverted index, which maps every value to the
+           primary keys of its cells. Chunks written by insert_many into a
+           column without sorted index are added on first use, with one set
+           per distinct value."""
+        if self._pending:
+            pending = self._pending
+            with _gc_paused():
+                for pks, vals in pending:
+                    self._add_many(pks, vals)
+            # only cleared once complete, readers that share the table lock
+            # may add the same chunks again, which changes nothing
+            self._pending = []
+        return self._values
+
+    @values.setter
+    def values(self, values: defaultdict) -> None:
+        self._values = values
+        self._pending = []
+
+    def _add_many(self, pks: Sequence[int], vals: Sequence[Hashable]) -> None:
+        """Adds the cells 'vals' of the rows 'pks' to the inverted index.
+           The primary keys are grouped by value first, so every distinct
+           value costs one set operation instead of one per cell."""
+        values = self._values
+        if len(set(vals)) == len(vals) and values.keys().isdisjoint(vals):
+            # all values are new, e.g. in unique columns
+            values.update(zip(vals, map(set, zip(pks))))
+            return
+        groups: dict = {}
+        for pk, val in zip(pks, vals):
+            group = groups.get(val)
+            if group is None:
+                groups[val] = [pk]
+            else:
+                group.append(pk)
+        for val, group in groups.items():
+            owners = values.get(val)
+            if owners is None:
+                values[val] = set(group)
+            else:
+                owners.update(group)
+
+    @property
+    def missing(self) -> set:
+        """Returns the primary keys of rows without a cell, their value is
+           the default. Computed as keys - cells on first use and cached
+           until the next write, so rows without a cell cost nothing."""
+        keys = self.keys
+        if keys is None or len(keys) == len(self.cells):
+            return set()
+        # rows are only added to the table between writes to the column,
+        # deletes drop the cells of every column
+        if self._missing is None or self._missing_stamp != len(keys):
+            self._missing = keys.difference(self.cells)
+            self._missing_stamp = len(keys)
+        return self._missing
+
+    @property
+    def n_missing(self) -> int:
+        """Returns the number of rows without a cell without computing
+           them."""
+        return len(self.keys) - len(self.cells) if self.keys is not None else 0
 
     def insert(self, pk: int, val: Hashable) -> None:
         if self.unique and val in self.values:
             raise UniqueConstraintError(f"{val} already present in column "
                                         f"(row {self.values[val]})")
-        self.cells[pk] = val
-        self.values[val].add(pk)
+        self.add_to_index(pk, val)
+        self.store(pk, val)
+
+    def add_to_index(self, pk: int, val: Hashable) -> None:
+        if not self.index:
+            if self.counts is None:
+                self._bounds = None
+            elif not self.counts[val]:
+                self._widen(val)
+                self.counts[val] += 1
+            else:
+                self.counts[val] += 1
+            return
+        owners = self.values.get(val)
+        if owners is not None:
+            owners.add(pk)
+            return
+        if self._bounds is not None:
+            self._widen(val)
+        if self.sorted_values is not None and val is not None:
+            insort(self.sorted_values, val)
+        self.values[val] = {pk}
+
+    def remove_from_index(self, pk: int, val: Hashable) -> None:
+        if not self.index:
+            if self.counts is None:
+                self._bounds = None
+                return
+            n_cells = self.counts.get(val, 0) - 1
+            if n_cells > 0:
+                self.counts[val] = n_cells
+            else:
+                self.counts.pop(val, None)
+                self._narrow(val)
+            return
+        if val not in self.values:
+            return
+        pks = self.values[val]
+        pks.discard(pk)
+        if not pks:
+            del self.values[val]
+            self._narrow(val)
+            if self.sorted_values is not None and val is not None:
+                del self.sorted_values[bisect_left(self.sorted_values, val)]
+
+    def _widen(self, val: Hashable) -> None:
+        """Extends the bounds by a new distinct value."""
+        bounds = self._bounds
+        if val is None or bounds is None or bounds is _UNORDERABLE:
+            return
+        if not bounds:
+            self._bounds = (val, val)
+            return
+        try:
+            if val < bounds[0]:
+                self._bounds = (val, bounds[1])
+            elif val > bounds[1]:
+                self._bounds = (bounds[0], val)
+        except TypeError:
+            self._bounds = _UNORDERABLE
+
+    def _narrow(self, val: Hashable) -> None:
+        """Invalidates the bounds if the last cell holding one of them is
+           gone."""
+        bounds = self._bounds
+        if bounds and bounds is not _UNORDERABLE and (
+                val == bounds[0] or val == bounds[1]):
+            self._bounds = None
+
+    def _distinct(self) -> Dict:
+        """Returns the inverted index or the value counts. Unindexed
+           columns without value counts count their cells first."""
+        if self.index:
+            return self.values
+        if self.counts is not None:
+            return self.counts
+        return Counter(self.cells.values())
+
+    def bounds(self) -> Tuple[Hashable, Hashable]:
+        """Returns the smallest and the largest value of the column except
+           None, including the default of rows without a cell. Both are None
+           if there is no such value or the values can not be compared."""
+        if self.sorted_values is not None:
+            vals = self.sorted_values[:1] + self.sorted_values[-1:]
+        else:
+            if self._bounds is None:
+                distinct = self._distinct()
+                try:
+                    self._bounds = (
+                        min(val for val in distinct if val is not None),
+                        max(val for val in distinct if val is not None))
+                except ValueError:
+                    self._bounds = ()
+                except TypeError:
+                    self._bounds = _UNORDERABLE
+            vals = list(self._bounds)
+        if self.n_missing and self.default is not None:
+            vals.append(self.default)
+        try:
+            return min(vals, default=None), max(vals, default=None)
+        except TypeError:
+            return None, None
+
+    def histogram(self) -> Dict[Hashable, int]:
+        """Returns the number of rows per value, including the rows whose
+           value is the default."""
+        if self.index:
+            counts = {val: len(pks) for val, pks in self.values.items()}
+        else:
+            counts = dict(self._distinct())
+        if self.n_missing:
+            counts[self.default] = counts.get(self.default, 0) + self.n_missing
+        return counts
+
+    def stats(self) -> Dict[str, Hashable]:
+        """Returns the statistics "rows" (number of rows), "distinct"
+           (number of distinct values), "nulls" (rows whose value is None),
+           "missing" (rows without a cell, their value is the default),
+           "min" and "max" (see bounds). Indexed columns and columns with
+           value counts keep them up to date on every change, other columns
+           count their cells on every call."""
+        distinct = self._distinct()
+        n_distinct = len(distinct)
+        nulls = len(distinct.get(None, ())) if self.index else distinct[None]
+        n_missing = self.n_missing
+        if n_missing:
+            if self.default not in distinct:
+                n_distinct += 1
+            if self.default is None:
+                nulls += n_missing
+        low, high = self.bounds()
+        return {"rows": len(self.cells) + n_missing,
+                "distinct": n_distinct, "nulls": nulls,
+                "missing": n_missing, "min": low, "max": high}
+
+    def rebuild_index(self) -> None:
+        """Rebuilds the inverted index and the sorted index from the
+           cells, or the value counts of an unindexed column."""
+        self._bounds = None
+        if not self.index:
+            if self.counts is not None:
+                self.counts = Counter(self.cells.values())
+            return
+        values: defaultdict = defaultdict(set)
+        if self.unique:
+            values.update({val: {pk} for pk, val in self.cells.items()})
+        else:
+            for pk, val in self.cells.items():
+                values[val].add(pk)
+        self.values = values
+        if self.sorted_values is not None:
+            self.sorted_values = sorted(val for val in values
+                                        if val is not None)
+
+    def create_sorted_index(self) -> None:
+        """Adds a sorted index to the column, which is kept up to date from
+           now on and answers range queries in O(log n + k)."""
+        if not self.index:
+            self.index = True
+            self.counts = None
+            for pk, val in self.cells.items():
+                self.values[val].add(pk)
+        self.sorted_values = sorted(val for val in self.values
+                                    if val is not None)
+
+    def check_unique(self, vals: Sequence[Hashable]) -> None:
+        """Raises UniqueConstraintError if any of 'vals' is already present
+           in the column or occurs more than once in 'vals' itself."""
+        if not self.unique:
+            return
+        values = self.values
+        if len(set(vals)) == len(vals) and values.keys().isdisjoint(vals):
+            return
+        seen: set = set()
+        for val in vals:
+            if val in seen:
+                raise UniqueConstraintError(f"{val} inserted more than once "
+                                            f"into unique column")
+            if val in values:
+                raise UniqueConstraintError(f"{val} already present in column "
+                                            f"(row {values[val]})")
+            seen.add(val)
+
+    def check_sortable(self, vals: Iterable[Hashable]) -> None:
+        """Raises TypeError if any of 'vals' can not be compared with each
+           other or with the values of the sorted index, like the sorted
+           index would on insert."""
+        sorted_values = self.sorted_values
+        if sorted_values is None:
+            return
+        new = [val for val in set(vals)
+               if val is not None and val not in self.values]
+        new.sort()
+        for val in new:
+            bisect_left(sorted_values, val)
+
+    def insert_many(self, pks: Sequence[int], vals: Sequence[Hashable]) -> None:
+        """Inserts 'vals' at the positions given by 'pks' in one operation.
+           Unique constraints and the sorted index have to be checked
+           beforehand with check_unique and check_sortable."""
+        sorted_values = self.sorted_values
+        if sorted_values is not None:
+            sorted_values = sorted_values + list(
+                {val for val in vals if val is not None
+                 and val not in self.values})
+            sorted_values.sort()
+        try:
+            if not isinstance(self.cells, ArrayCells):
+                self.cells.update(zip(pks, vals))
+            elif not self.cells.extend(pks, vals):
+                for pk, val in zip(pks, vals):
+                    self.store(pk, val)
+        except (TypeError, OverflowError):
+            # values that do not fit the typecode, like in store
+            self.cells = dict(self.cells.items())
+            self.cells.update(zip(pks, vals))
+        if sorted_values is not None:
+            self._add_many(pks, vals)
+        elif self.index:
+            # built on first use, see values
+            self._pending.append((pks, vals))
+        elif self.counts is not None:
+            self.counts.update(vals)
+        self.sorted_values = sorted_values
+        # cheaper to recompute from the distinct values once needed than to
+        # compare every inserted value
+        self._bounds = None
+        self._missing = None
+
+    def check_unique_update(self, updates: Dict[int, Hashable]) -> None:
+        """Raises UniqueConstraintError if setting the cells in 'updates'
+           ({pk: value}) would store a value more than once."""
+        if not self.unique:
+            return
+        seen: set = set()
+        for val in updates.values():
+            if val in seen:
+                raise UniqueConstraintError(f"{val} set more than once in "
+                                            f"unique column")
+            seen.add(val)
+            owners = self.values.get(val, ())
+            if any(owner not in updates for owner in owners):
+                raise UniqueConstraintError(f"{val} already present in column "
+                                            f"(row {owners})")
+
+    def update_many(self, updates: Dict[int, Hashable]) -> None:
+        """Sets the cells in 'updates' ({pk: value}) and keeps the indexes
+           consistent. Unique constraints have to be checked beforehand with
+           check_unique_update."""
+        cells = self.cells
+        for pk, val in updates.items():
+            if pk in cells:
+                old = cells[pk]
+                if old is val:
+                    continue
+                self.remove_from_index(pk, old)
+            self.add_to_index(pk, val)
+            self.store(pk, val)
+            cells = self.cells
+
+    def store(self, pk: int, val: Hashable) -> None:
+        """Writes a cell without touching the index. Array-backed cells fall
+           back to a dict if the key is sparse or the value does not fit."""
+        try:
+            self.cells[pk] = val
+        except (SparseKeyError, TypeError, OverflowError):
+            self.cells = dict(self.cells.items())
+            self.cells[pk] = val
+        self._missing = None
 
     def drop(self, pk: int) -> None:
+        self._missing = None
         if pk in self.cells:
             val = self.cells[pk]
             del self.cells[pk]
-            self.values[val].remove(pk)
-            if not self.values[val]:
+            self.remove_from_index(pk, val)
+
+    def drop_many(self, pks: Set[int]) -> None:
+        """Drops the cells of all 'pks' and updates the indexes once per
+           distinct value instead of once per cell."""
+        self._missing = None
+        cells = self.cells
+        if not self.index:
+            self._bounds = None
+            if self.counts is None:
+                for pk in pks:
+                    cells.pop(pk, None)
+                return
+            for pk in pks:
+                val = cells.pop(pk, _NOTHING)
+                if val is not _NOTHING:
+                    self.remove_from_index(pk, val)
+            return
+
+        by_value: dict = defaultdict(list)
+        for pk in pks:
+            val = cells.pop(pk, _NOTHING)
+            if val is not _NOTHING:
+                by_value[val].append(pk)
+        emptied = []
+        for val, dropped in by_value.items():
+            owners = self.values[val]
+            owners.difference_update(dropped)
+            if not owners:
                 del self.values[val]
+                self._narrow(val)
+                if val is not None:
+                    emptied.append(val)
+
+        if self.sorted_values is not None and emptied:
+            if len(emptied) < 64:
+                for val in emptied:
+                    del self.sorted_values[bisect_left(self.sorted_values, val)]
+            else:
+                self.sorted_values = [val for val in self.sorted_values
+                                      if val in self.values]
 
     def find(self, val: Hashable) -> Set:
-        return self.values.get(val, set())
+        if self.index:
+            return self.values.get(val, set())
+        return {pk for pk, v in self.cells.items() if v == val}
+
+    def find_many(self, vals: Iterable[Hashable]) -> Set:
+        """Returns the primary keys of all cells whose value is in 'vals'."""
+        if self.index:
+            results: set = set()
+            for val in vals:
+                results.update(self.values.get(val, ()))
+            return results
+        vals = set(vals)
+        return {pk for pk, v in self.cells.items() if v in vals}
+
+    def find_range(self, bounds: BOUNDS) -> Set:
+        """Returns the primary keys of all cells whose value lies within
+           'bounds', a list of (operator, value) tuples like ("gte", 10)."""
+        if self.sorted_values is None:
+            if self.index:
+                return self.find_many(val for val in self.values
+                                      if in_range(val, bounds))
+            return {pk for pk, val in self.cells.items()
+                    if in_range(val, bounds)}
+        start, stop = self._range_slice(bounds)
+        return self.find_many(self.sorted_values[start:stop])
+
+    def _range_slice(self, bounds: BOUNDS) -> Tuple[int, int]:
+        sorted_values = self.sorted_values
+        start, stop = 0, len(sorted_values)
+        for op, val in bounds:
+            if op == "gt":
+                start = max(start, bisect_right(sorted_values, val))
+            elif op == "gte":
+                start = max(start, bisect_left(sorted_values, val))
+            elif op == "lt":
+                stop = min(stop, bisect_left(sorted_values, val))
+            else:
+                stop = min(stop, bisect_right(sorted_values, val))
+        return start, stop
+
+    def estimate(self, query) -> Optional[int]:
+        """Estimates the number of rows that match 'query' as passed to
+           Table.find. Exact for values and lists of values, which are
+           counted from the index or the value counts. Returns None if only
+           a scan can tell."""
+        if isinstance(query, dict):
+            bounds, members = parse_operators(query)
+            estimates = [self.estimate(vals) for vals in members]
+            if bounds:
+                estimates.append(self._estimate_range(bounds))
+            known = [e for e in estimates if e is not None]
+            return min(known) if known else None
+        if isinstance(query, Iterable) and not isinstance(query, str):
+            vals = set(query)
+        else:
+            vals = {query}
+        if self.index:
+            n_rows = sum(len(self.values.get(val, ())) for val in vals)
+        elif self.counts is not None:
+            n_rows = sum(map(self.counts.__getitem__, vals))
+        else:
+            return None
+        if self.default in vals:
+            n_rows += self.n_missing
+        return n_rows
+
+    def _estimate_range(self, bounds: BOUNDS) -> Optional[int]:
+        if self.sorted_values is None:
+            return None
+        sorted_values = self.sorted_values
+        start, stop = self._range_slice(bounds)
+        if start >= stop:
+            n_rows = 0
+        else:
+            n_cells = len(self.cells) - len(self.values.get(None, ()))
+            n_rows = n_cells * (stop - start) // len(sorted_values) or 1
+        if in_range(self.default, bounds):
+            n_rows += self.n_missing
+        return n_rows
 
     def find_value(self, pk: int) -> Hashable:
         return self.cells.get(pk, self.default)
 
+    def take(self, pks: List[int]) -> Sequence:
+        """Returns the values of 'pks' in order. Array-backed cells return
+           an array.array without creating Python objects per value if
+           'pks' is a run of consecutive keys without gaps."""
+        if isinstance(self.cells, ArrayCells):
+            values = self.cells.slice(pks)
+            if values is not None:
+                return values
+            return self.cells.take(pks, self.default)
+        return list(map(self.cells.get, pks, repeat(self.default)))
+
     def __len__(self):
         return len(self.cells)
@@ -1,28 +1,46 @@
 from __future__ import annotations
-from typing import List, Optional
-
-import dataset
+from functools import partial
+import os
+import threading
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple, Union
 
 from pymemdb import TableAlreadyExists
 from pymemdb import Table
+from pymemdb import snapshot
+from pymemdb import sqlite
+from pymemdb import wal
+from pymemdb.join import hash_join
+from pymemdb.table import PROGRESS
+
+if TYPE_CHECKING:  # pragma: no cover
+    import dataset
 
 
 class Database:
 
-    def __init__(self) -> None:
+    def __init__(self, thread_safe: bool = False) -> None:
         self._tables: dict = dict()
+        self.thread_safe = thread_safe
+        self._wal: Optional[wal.WriteAheadLog] = None
 
-    def create_table(self, name: str, primary_id: str = "id") -> Table:
+    def create_table(self, name: str, primary_id: str = "id",
+                     index: bool = True) -> Table:
         if name in self._tables:
             raise TableAlreadyExists(name)
 
-        self._tables[name] = Table(name, primary_id=primary_id)
+        self._tables[name] = Table(name, primary_id=primary_id, index=index,
+                                   thread_safe=self.thread_safe)
+        if self._wal is not None:
+            self._wal.log(name, ("create_table", primary_id, index))
+            self._tables[name].wal = partial(self._wal.log, name)
 
         return self._tables[name]
 
     def drop_table(self, name: str) -> None:
         self._tables[name].drop()
         del self._tables[name]
+        if self._wal is not None:
+            self._wal.log(name, ("drop_table",))
 
     def __getitem__(self, name: str):
         if name not in self._tables:
@@ -36,25 +54,199 @@ class Database:
         if not isinstance(item, Table):
             raise TypeError(f"{item} not an instance of 'Table'!")
         self._tables[key] = item
+        if self._wal is not None:
+            wal.log_table(self._wal, key, item)
+            item.wal = partial(self._wal.log, key)
 
     @property
     def tables(self) -> List[Optional[str]]:
         return list(self._tables)
 
-    def to_dataset(self, db: dataset.Database, chunk_size: int = 1000) -> dataset.Database:
+    def join(self, left: str, right: str, on: Union[str, Tuple[str, str]],
+             how: str = "inner", columns: Optional[List[str]] = None,
+             chunk_size: int = 1000) -> Iterator[dict]:
+        """Joins the rows of two tables on equal values with a hash join and
+           yields the joined rows as dicts. If the join column of the right
+           table is indexed, its inverted index is probed directly. None
+           never matches.
+
+        Arguments:
+            left {str} -- name of the left table
+            right {str} -- name of the right table
+            on {Union[str, Tuple[str, str]]} -- join column of both tables
+                or a tuple of the left and the right join column
+
+        Keyword Arguments:
+            how {str} -- "inner" yields matching rows only, "left" also
+                yields left rows without a match, their right columns are
+                None (default: {"inner"})
+            columns {Optional[List[str]]} -- keys of the joined rows to
+                return. Right columns whose name is also a left column are
+                returned as "<right>.<column>" (default: {None})
+            chunk_size {int} -- number of left rows joined at once
+                                (default: {1000})
+
+        Raises:
+            ColumnDoesNotExist: [if a join column or a column in 'columns'
+                                 does not exist]
+            ValueError: [if 'how' is not "inner" or "left"]
+
+        Returns:
+            Iterator[dict] -- [joined rows]
+        """
+        left_on, right_on = (on, on) if isinstance(on, str) else on
+        return hash_join(self._tables[left], self._tables[right], left, right,
+                         left_on, right_on, how=how, columns=columns,
+                         chunk_size=chunk_size)
+
+    def save(self, path: str, indexes: bool = True) -> None:
+        """Writes a binary snapshot of all tables to 'path'. The file is
+           written next to 'path' first and then moved into place. If the
+           database was opened from 'path', the write-ahead log is compacted
+           into it instead, so the snapshot records which log segments it
+           contains.
+
+        Arguments:
+            path {str} -- path of the snapshot file
+
+        Keyword Arguments:
+            indexes {bool} -- store the inverted indexes as well. Otherwise
+                they are rebuilt on load (default: {True})
+        """
+        if self._wal is not None and \
+                os.path.abspath(path) == os.path.abspath(self._wal.path):
+            self._wal.checkpoint()
+            return
+        snapshot.save(self, path, indexes=indexes)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True,
+             thread_safe: bool = False) -> Database:
+        """Loads a snapshot written by save. Snapshots contain pickles, only
+           load files from trusted sources.
+
+        Arguments:
+            path {str} -- path of the snapshot file
+
+        Keyword Arguments:
+            mmap {bool} -- memory-map the file, the cells of array-backed
+                columns then stay in the file until they are first written
+                to (default: {True})
+            thread_safe {bool} -- give every table a reader-writer lock,
+                like Database(thread_safe=True) (default: {False})
+
+        Raises:
+            ValueError: [if the file is not a snapshot or was written on a
+                         platform with different sizes of array values]
+        """
+        return snapshot.load(cls, path, use_mmap=mmap, thread_safe=thread_safe)
+
+    @classmethod
+    def open(cls, path: str, sync: str = "batch", batch_size: int = 1000,
+             compact_size: Optional[int] = None, mmap: bool = True,
+             thread_safe: bool = False) -> Database:
+        """Opens a database that is persisted to the snapshot 'path' and a
+           write-ahead log next to it. Loads the snapshot if it exists and
+           replays the log. Changes are then appended to the log until
+           close is called.
+
+        Arguments:
+            path {str} -- path of the snapshot file
+
+        Keyword Arguments:
+            sync {str} -- "always" to write and fsync every change before
+                it returns, "batch" to write and fsync every 'batch_size'
+                changes and on commit or "never" to write in batches
+                without fsync (default: {"batch"})
+            batch_size {int} -- number of changes that are buffered
+                                (default: {1000})
+            compact_size {Optional[int]} -- compact the log in the
+                background whenever it grows beyond this many bytes. Never
+                if None (default: {None})
+            mmap {bool} -- memory-map the snapshot, see load
+                           (default: {True})
+            thread_safe {bool} -- give every table a reader-writer lock,
+                like Database(thread_safe=True) (default: {False})
+        """
+        return wal.open_database(cls, path, mmap=mmap,
+                                 thread_safe=thread_safe, sync=sync,
+                                 batch_size=batch_size,
+                                 compact_size=compact_size)
+
+    def _attach_wal(self, log: wal.WriteAheadLog) -> None:
+        self._wal = log
+        for name, table in self._tables.items():
+            table.wal = partial(log.log, name)
+
+    def commit(self) -> None:
+        """Writes and fsyncs all buffered changes to the write-ahead log."""
+        if self._wal is not None:
+            self._wal.flush()
+
+    def compact(self) -> Optional[threading.Thread]:
+        """Folds the write-ahead log into the snapshot in a background
+           thread and returns the thread."""
+        if self._wal is None:
+            return None
+        return self._wal.compact()
+
+    def close(self) -> None:
+        """Writes all buffered changes, waits for a running compaction and
+           stops logging."""
+        if self._wal is None:
+            return
+        self._wal.close()
+        self._wal = None
+        for table in self._tables.values():
+            table.wal = None
+
+    def to_dataset(self, db: dataset.Database, chunk_size: int = 1000,
+                   progress: Optional[PROGRESS] = None) -> dataset.Database:
         for tablename in self.tables:
-            pk_id = self._tables[tablename].idx_name
-            tableobject = db.create_table(tablename, primary_id=pk_id)
-            tableobject.insert_many(list(self._tables[tablename].all()),
-                                    chunk_size=chunk_size)
+            self._tables[tablename].to_dataset(db, chunk_size=chunk_size,
+                                               name=tablename,
+                                               progress=progress)
 
         return db
 
+    def to_sqlite(self, target: sqlite.CONNECTION, drop: bool = False,
+                  chunk_size: int = 10000,
+                  indexes: sqlite.INDEXES = False) -> None:
+        with sqlite.connect(target) as conn:
+            for tablename in self.tables:
+                self._tables[tablename].to_sqlite(conn, name=tablename,
+                                                  drop=drop,
+                                                  chunk_size=chunk_size,
+                                                  indexes=indexes)
+
+    @classmethod
+    def from_sqlite(cls, target: sqlite.CONNECTION,
+                    chunk_size: int = 10000) -> Database:
+        pymemdb_database = cls()
+
+        with sqlite.connect(target) as conn:
+            for tablename in sqlite.table_names(conn):
+                pymemdb_database[tablename] = Table.from_sqlite(
+                    conn, tablename, chunk_size=chunk_size)
+
+        return pymemdb_database
+
     @classmethod
-    def from_dataset(cls, db: dataset.Database) -> Database:
+    def from_dataset(cls, db: dataset.Database, chunk_size: int = 10000,
+                     max_workers: int = 1) -> Database:
         pymemdb_database = cls()
 
-        for tablename in db.tables:
-            pymemdb_database[tablename] = Table.from_dataset(db[tablename])
+        tables = [db[tablename] for tablename in db.tables]
+        load = partial(Table.from_dataset, chunk_size=chunk_size)
+        if max_workers == 1:
+            loaded = list(map(load, tables))
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            # each thread reads through its own connection of 'db', so this
+            # does not work for in-memory sqlite databases
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                loaded = list(pool.map(load, tables))
+        for table in loaded:
+            pymemdb_database[table.name] = table
 
         return pymemdb_database
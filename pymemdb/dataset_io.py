@@ -0,0 +1,68 @@
+"""Loading from and exporting to dataset. This module is only imported on the
+first call of from_dataset or to_dataset, so that 'import pymemdb' does not
+pull in dataset and SQLAlchemy."""
+
+from typing import List, Optional
+
+import dataset
+from sqlalchemy import select
+
+from .errors import ColumnDoesNotExist
+
+
+def read_table(cls, table: dataset.table.Table, name: Optional[str] = None,
+               chunk_size: int = 10000, columns: Optional[List[str]] = None,
+               where: Optional[dict] = None):
+    if name is None:
+        name = table.name
+
+    sa_table = table.table
+    pk = None
+    for col in sa_table.columns:
+        if col.primary_key is True:
+            pk = col.name
+            break
+
+    if columns is not None:
+        for col in columns:
+            if col not in sa_table.columns:
+                raise ColumnDoesNotExist(col)
+    selected = [col for col in sa_table.columns
+                if columns is None or col.name in columns or col.name == pk]
+    query = select(*selected)
+    if where:
+        query = query.where(table._args_to_clause(where))
+
+    pymemdb_table = cls(name, primary_id=pk)
+    names = [col.name for col in selected]
+    for col in names:
+        if col not in pymemdb_table.columns:
+            pymemdb_table.create_column(col)
+
+    result = table.db.executable.execute(
+        query.execution_options(stream_results=True))
+    try:
+        pymemdb_table._load_tuples(names, result.partitions(chunk_size))
+    finally:
+        result.close()
+
+    return pymemdb_table
+
+
+def write_table(table, db: dataset.Database, drop: bool = False,
+                chunk_size: int = 1000, name: Optional[str] = None,
+                progress=None) -> None:
+    name = table.name if name is None else name
+    if name in db.tables and drop:
+        db[name].drop()
+    if name not in db.tables:
+        db.create_table(name, primary_id=table.idx_name)
+
+    n_written = 0
+    with db as tx:
+        target = tx[name]
+        for chunk in table.iter_chunks(chunk_size):
+            target.insert_many(chunk, chunk_size=chunk_size)
+            n_written += len(chunk)
+            if progress is not None:
+                progress(name, n_written, len(table))
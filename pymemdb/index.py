@@ -0,0 +1,68 @@
+"""Indexes over several columns of a table."""
+
+from typing import Dict, Hashable, Iterable, Sequence, Set, Tuple
+
+from .errors import UniqueConstraintError
+
+KEY = Tuple[Hashable, ...]
+
+
+class CompositeIndex:
+    """Maps the tuples of the values of 'columns' to the primary keys of the
+       rows that hold them. A unique index admits every tuple only once."""
+
+    def __init__(self, columns: Sequence[str], unique: bool = False) -> None:
+        self.columns = tuple(columns)
+        self.unique = unique
+        self.entries: Dict[KEY, set] = {}
+
+    def find(self, key: KEY) -> Set:
+        return self.entries.get(key, set())
+
+    def check(self, keys: Sequence[KEY], replaced: Set = frozenset()) -> None:
+        """Raises UniqueConstraintError if any of 'keys' is held by a row
+           that is not in 'replaced' or occurs more than once in 'keys'."""
+        if not self.unique:
+            return
+        new = set(keys)
+        if len(new) < len(keys):
+            seen: set = set()
+            for key in keys:
+                if key in seen:
+                    raise UniqueConstraintError(
+                        f"{key} inserted more than once into unique index "
+                        f"{self.columns}")
+                seen.add(key)
+        # only the keys that are already present have to be looked at
+        entries = self.entries
+        for key in filter(entries.__contains__, new):
+            owners = entries[key]
+            if not owners.issubset(replaced):
+                raise UniqueConstraintError(f"{key} already present in unique "
+                                            f"index {self.columns} "
+                                            f"(row {owners})")
+
+    def add_many(self, pks: Sequence[Hashable], keys: Sequence[KEY]) -> None:
+        entries = self.entries
+        if self.unique and entries.keys().isdisjoint(keys):
+            entries.update({key: {pk} for pk, key in zip(pks, keys)})
+            return
+        for pk, key in zip(pks, keys):
+            owners = entries.get(key)
+            if owners is None:
+                entries[key] = {pk}
+            else:
+                owners.add(pk)
+
+    def remove_many(self, pks: Sequence[Hashable], keys: Iterable[KEY]) -> None:
+        entries = self.entries
+        for pk, key in zip(pks, keys):
+            owners = entries.get(key)
+            if owners is None:
+                continue
+            owners.discard(pk)
+            if not owners:
+                del entries[key]
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,127 @@
+"""Hash join of two tables."""
+
+from contextlib import nullcontext
+from itertools import islice
+from typing import Dict, Generator, Hashable, Iterator, List, Optional, Tuple
+
+from .column import Column
+from .errors import ColumnDoesNotExist
+
+JOIN_TYPES = ("inner", "left")
+
+_NO_MATCH = object()
+
+
+def _reading(table):
+    return table._lock.read() if table._lock is not None else nullcontext()
+
+
+def _build(column: Column) -> Dict[Hashable, List]:
+    """Maps every value of an unindexed column to its primary keys."""
+    table: Dict[Hashable, List] = {}
+    for pk, val in column.cells.items():
+        table.setdefault(val, []).append(pk)
+    if column.n_missing:
+        table.setdefault(column.default, []).extend(column.missing)
+    return table
+
+
+def _probe(column: Column, table: Optional[dict], val: Hashable):
+    if table is not None:
+        return table.get(val, ())
+    pks = column.values.get(val, ())
+    if val == column.default and column.n_missing:
+        return [*pks, *column.missing]
+    return pks
+
+
+def output_names(left, right, left_name: str, right_name: str,
+                 left_on: str, right_on: str) -> Tuple[List[str], List[str]]:
+    """Returns the keys of the left and of the right columns in a joined
+       row. Right columns that clash with a left column are prefixed with
+       the name of the right table, the join column is only included once
+       if it has the same name on both sides."""
+    left_names = left.columns
+    right_names = []
+    for col in right.columns:
+        if col == right_on and col == left_on:
+            continue
+        right_names.append(f"{right_name}.{col}" if col in left_names else col)
+    return left_names, right_names
+
+
+def hash_join(left, right, left_name: str, right_name: str, left_on: str,
+              right_on: str, how: str = "inner",
+              columns: Optional[List[str]] = None,
+              chunk_size: int = 1000) -> Iterator[dict]:
+    if how not in JOIN_TYPES:
+        raise ValueError(f"Unknown join type '{how}'! Valid types are "
+                         f"{list(JOIN_TYPES)}")
+    for table, col in [(left, left_on), (right, right_on)]:
+        if col not in table.columns:
+            raise ColumnDoesNotExist(col)
+
+    left_names, right_names = output_names(left, right, left_name, right_name,
+                                           left_on, right_on)
+    left_selected = [(name, left[name]) for name in left_names]
+    right_cols = [col for col in right.columns
+                  if not col == right_on == left_on]
+    right_selected = [(name, right[col])
+                      for name, col in zip(right_names, right_cols)]
+    if columns is not None:
+        known = {name for name, _ in left_selected + right_selected}
+        for name in columns:
+            if name not in known:
+                raise ColumnDoesNotExist(name)
+        left_selected = [(n, c) for n, c in left_selected if n in columns]
+        right_selected = [(n, c) for n, c in right_selected if n in columns]
+
+    return _join(left, right, left[left_on], right[right_on], left_selected,
+                 right_selected, how, chunk_size)
+
+
+def _join(left, right, left_key: Column, right_key: Column,
+          left_selected: List[Tuple[str, Column]],
+          right_selected: List[Tuple[str, Column]], how: str,
+          chunk_size: int) -> Generator[dict, None, None]:
+    with _reading(right):
+        # indexed columns are probed through their inverted index
+        built = None if right_key.index else _build(right_key)
+    names = [name for name, _ in left_selected + right_selected]
+
+    with _reading(left):
+        keys = iter(list(left.keys))
+    while True:
+        pks = list(islice(keys, chunk_size))
+        if not pks:
+            return
+        # matching pairs as positions in 'pks' and primary keys of the right
+        # table, the columns are then taken in one go per chunk
+        positions: List[int] = []
+        right_pks: List[Hashable] = []
+        unmatched: List[int] = []
+        with _reading(left), _reading(right):
+            pks = [pk for pk in pks if pk in left.keys]
+            for i, key in enumerate(left_key.take(pks)):
+                matches = () if key is None else _probe(right_key, built, key)
+                for right_pk in matches:
+                    positions.append(i)
+                    right_pks.append(right_pk)
+                if not matches and how == "left":
+                    unmatched.append(len(positions))
+                    positions.append(i)
+                    right_pks.append(_NO_MATCH)
+            values = [list(map(column.take(pks).__getitem__, positions))
+                      for _, column in left_selected]
+            for _, column in right_selected:
+                right_values = column.take(right_pks)
+                if unmatched:
+                    right_values = list(right_values)
+                    for j in unmatched:
+                        right_values[j] = None
+                values.append(right_values)
+        if not values:
+            yield from ({} for _ in positions)
+            continue
+        for row in zip(*values):
+            yield dict(zip(names, row))
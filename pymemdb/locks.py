@@ -0,0 +1,138 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Generator, Iterator, Optional
+
+
+class RWLock:
+    """Reader-writer lock that admits any number of readers or a single
+       writer. Waiting writers hold back new readers and readers that waited
+       for a writer go first once it is done, so neither side can starve
+       the other. Both sides are reentrant and the writer may read, a
+       reader can not start to write."""
+
+    def __init__(self) -> None:
+        self._mutex = threading.Lock()
+        self._cond = threading.Condition(self._mutex)
+        self._readers = 0
+        self._waiting_readers = 0
+        self._waiting_writers = 0
+        # readers that waited for the last writer and may go before the
+        # next one, recognised by the generation they started waiting in
+        self._admitted = 0
+        self._generation = 0
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+        # thread id -> number of nested read locks held
+        self._read_depth: Dict[int, int] = {}
+
+    def acquire_read(self) -> None:
+        me = threading.get_ident()
+        depth = self._read_depth.get(me, 0)
+        if depth or self._writer == me:
+            self._read_depth[me] = depth + 1
+            return
+        with self._mutex:
+            if self._writer is not None or self._waiting_writers:
+                generation = self._generation
+                self._waiting_readers += 1
+                while self._writer is not None or (
+                        self._waiting_writers and generation == self._generation):
+                    self._cond.wait()
+                self._waiting_readers -= 1
+                if generation != self._generation:
+                    self._admitted -= 1
+            self._readers += 1
+        self._read_depth[me] = 1
+
+    def release_read(self) -> None:
+        me = threading.get_ident()
+        depth = self._read_depth.pop(me) - 1
+        if depth:
+            self._read_depth[me] = depth
+            return
+        if self._writer == me:
+            return
+        with self._mutex:
+            self._readers -= 1
+            if not self._readers and self._waiting_writers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if me in self._read_depth:
+            raise RuntimeError("A reader can not acquire the write lock")
+        with self._mutex:
+            if self._writer is not None or self._readers or self._admitted:
+                self._waiting_writers += 1
+                while self._writer is not None or self._readers or self._admitted:
+                    self._cond.wait()
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        self._write_depth -= 1
+        if self._write_depth:
+            return
+        with self._mutex:
+            self._writer = None
+            self._generation += 1
+            self._admitted = self._waiting_readers
+            if self._waiting_readers or self._waiting_writers:
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self) -> Generator[None, None, None]:
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Generator[None, None, None]:
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def reading(method: Callable) -> Callable:
+    """Runs a method of a Table under the read lock of the table, if it has
+       one. Returned iterators are consumed under the lock, so they never
+       see a concurrent write."""
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        lock = self._lock
+        if lock is None:
+            return method(self, *args, **kwargs)
+        lock.acquire_read()
+        try:
+            result = method(self, *args, **kwargs)
+            if isinstance(result, Iterator):
+                result = iter(list(result))
+            return result
+        finally:
+            lock.release_read()
+    return locked
+
+
+def writing(method: Callable) -> Callable:
+    """Runs a method of a Table under the write lock of the table, if it
+       has one."""
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        lock = self._lock
+        if lock is None:
+            return method(self, *args, **kwargs)
+        lock.acquire_write()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            lock.release_write()
+    return locked
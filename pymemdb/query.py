@@ -0,0 +1,71 @@
+import operator
+from collections.abc import Collection, Iterable
+from typing import Callable, Hashable, List, Tuple
+
+RANGE_OPERATORS = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+BOUNDS = List[Tuple[str, Hashable]]
+
+
+def parse_operators(query: dict) -> Tuple[BOUNDS, List[tuple]]:
+    """Splits an operator query like {"gt": 10, "lte": 50} into a list of
+       range bounds and a list of value collections of which the value has
+       to be a member ("eq" and "in")."""
+    bounds: BOUNDS = []
+    members: List[tuple] = []
+    for op, arg in query.items():
+        if op in RANGE_OPERATORS:
+            bounds.append((op, arg))
+        elif op == "between":
+            low, high = arg
+            bounds.extend([("gte", low), ("lte", high)])
+        elif op == "eq":
+            members.append((arg,))
+        elif op == "in":
+            members.append(tuple(arg))
+        else:
+            raise ValueError(f"Unknown operator '{op}'! Valid operators are "
+                             f"{sorted([*RANGE_OPERATORS, 'between', 'eq', 'in'])}")
+    return bounds, members
+
+
+def materialize(query):
+    """Turns iterators in a query as it is passed to Table.find, e.g.
+       generators, into lists, so that the query can be read more than
+       once."""
+    if isinstance(query, dict):
+        return {op: list(arg) if op == "in" and not isinstance(arg, Collection)
+                else arg for op, arg in query.items()}
+    if isinstance(query, Iterable) and not isinstance(query, Collection):
+        return list(query)
+    return query
+
+
+def in_range(value: Hashable, bounds: BOUNDS) -> bool:
+    """True if value satisfies all bounds. None and values that can not be
+       compared to the bounds never match."""
+    if value is None:
+        return False
+    try:
+        return all(RANGE_OPERATORS[op](value, arg) for op, arg in bounds)
+    except TypeError:
+        return False
+
+
+def predicate(query) -> Callable[[Hashable], bool]:
+    """Returns a function that tests a single value against a query as it is
+       passed to Table.find."""
+    if isinstance(query, dict):
+        bounds, members = parse_operators(query)
+        member_sets = [set(m) for m in members]
+        return lambda value: ((not bounds or in_range(value, bounds))
+                              and all(value in m for m in member_sets))
+    if isinstance(query, Iterable) and not isinstance(query, str):
+        vals = set(query)
+        return lambda value: value in vals
+    return lambda value: value == query
@@ -0,0 +1,188 @@
+"""Binary snapshots of a Database.
+
+A snapshot file starts with MAGIC and holds one blob per column part:
+array-backed cells as raw machine values, everything else pickled. A
+pickled header that describes all tables and points to the blobs follows
+them. The file ends with the offset of the header and MAGIC again.
+Array-backed cells can be memory-mapped on load without copying them.
+
+Snapshots contain pickles, only load files from trusted sources."""
+
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Optional, Tuple
+
+from .column import Column
+from .storage import ArrayCells
+from .table import Table, _gc_paused
+
+MAGIC = b"PYMEMDB\x01"
+VERSION = 1
+_TRAILER = struct.Struct("<Q8s")
+# blobs start at multiples of this so that mapped arrays are aligned
+_ALIGN = 8
+
+BLOB = Tuple[int, int]
+
+
+class _Writer:
+
+    def __init__(self, file) -> None:
+        self.file = file
+        self.pos = file.write(MAGIC)
+
+    def blob(self, data) -> BLOB:
+        """Writes a bytes-like object and returns its (offset, size)."""
+        self.pos += self.file.write(bytes(-self.pos % _ALIGN))
+        start = self.pos
+        self.pos += self.file.write(data)
+        return start, self.pos - start
+
+    def pickle(self, obj) -> BLOB:
+        return self.blob(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _save_column(writer: _Writer, column: Column, indexes: bool) -> dict:
+    meta = {"default": column.default, "unique": column.unique,
+            "index": column.index,
+            "sorted_index": column.sorted_values is not None,
+            "counts": column.counts is not None}
+    cells = column.cells
+    if isinstance(cells, ArrayCells):
+        meta["array"] = {"typecode": cells.typecode,
+                         "itemsize": cells.data.itemsize,
+                         "offset": cells.offset, "count": len(cells),
+                         "data": writer.blob(cells.data),
+                         "valid": writer.blob(cells.valid)}
+    else:
+        meta["cells"] = writer.pickle(cells)
+    # unique indexes hold one set per row and are faster to rebuild than
+    # to unpickle
+    if indexes and column.index and not column.unique:
+        meta["values"] = writer.pickle((column.values, column.sorted_values))
+    return meta
+
+
+def _save_table(writer: _Writer, name: str, table: Table,
+                indexes: bool) -> dict:
+    return {"name": name, "table_name": table.name,
+            "primary_id": table.idx_name, "index": table.default_index,
+            "idx": table.idx, "keys": writer.pickle(table.keys),
+            "columns": {col: _save_column(writer, table[col], indexes)
+                        for col in table.columns},
+            # composite indexes are rebuilt on load
+            "indexes": [(list(names), index.unique)
+                        for names, index in table._indexes.items()]}
+
+
+def save(database, path: str, indexes: bool = True,
+         extra: Optional[dict] = None) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        writer = _Writer(file)
+        tables = []
+        for name in database.tables:
+            table = database[name]
+            if table._lock is not None:
+                table._lock.acquire_read()
+            try:
+                tables.append(_save_table(writer, name, table, indexes))
+            finally:
+                if table._lock is not None:
+                    table._lock.release_read()
+        header = {"version": VERSION, "byteorder": sys.byteorder,
+                  "tables": tables, "extra": extra or {}}
+        header_offset = writer.pickle(header)[0]
+        file.write(_TRAILER.pack(header_offset, MAGIC))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def _load_cells(view: memoryview, meta: dict, byteorder: str):
+    typecode = meta["typecode"]
+    start, size = meta["data"]
+    data = view[start:start + size]
+    if array(typecode).itemsize != meta["itemsize"]:
+        raise ValueError(f"Snapshot stores typecode '{typecode}' with "
+                         f"{meta['itemsize']} bytes per value, this platform "
+                         f"uses {array(typecode).itemsize}")
+    start, size = meta["valid"]
+    valid = bytearray(view[start:start + size])
+    if byteorder == sys.byteorder and isinstance(view.obj, mmap.mmap):
+        data = data.cast(typecode)
+    else:
+        values = array(typecode)
+        values.frombytes(data)
+        if byteorder != sys.byteorder:
+            values.byteswap()
+        data = values
+    return ArrayCells.from_buffer(typecode, data, valid, meta["offset"],
+                                  meta["count"])
+
+
+def _load_column(view: memoryview, meta: dict, byteorder: str) -> Column:
+    def unpickle(blob: BLOB):
+        start, size = blob
+        return pickle.loads(view[start:start + size])
+
+    column = Column(default=meta["default"], unique=meta["unique"],
+                    index=meta["index"], sorted_index=meta["sorted_index"],
+                    counts=meta.get("counts", False))
+    if "array" in meta:
+        column.cells = _load_cells(view, meta["array"], byteorder)
+    else:
+        column.cells = unpickle(meta["cells"])
+    if "values" in meta:
+        column.values, column.sorted_values = unpickle(meta["values"])
+    else:
+        # also counts the values of unindexed columns with counts=True
+        column.rebuild_index()
+    return column
+
+
+def load(cls, path: str, use_mmap: bool = True, thread_safe: bool = False):
+    return read(cls, path, use_mmap=use_mmap, thread_safe=thread_safe)[0]
+
+
+def read(cls, path: str, use_mmap: bool = True,
+         thread_safe: bool = False) -> Tuple[Any, dict]:
+    """Loads a snapshot and returns the database and the 'extra' dict that
+       was passed to save."""
+    with open(path, "rb") as file:
+        if use_mmap:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = file.read()
+    view = memoryview(buffer)
+    if len(view) < len(MAGIC) + _TRAILER.size or view[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a pymemdb snapshot")
+    header_offset, magic = _TRAILER.unpack(view[-_TRAILER.size:])
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a pymemdb snapshot")
+    header = pickle.loads(view[header_offset:-_TRAILER.size])
+    if header["version"] != VERSION:
+        raise ValueError(f"Unsupported snapshot version {header['version']}")
+
+    database = cls(thread_safe=thread_safe)
+    with _gc_paused():
+        for meta in header["tables"]:
+            table = Table(meta["table_name"], primary_id=meta["primary_id"],
+                          index=meta["index"], thread_safe=thread_safe)
+            start, size = meta["keys"]
+            table.keys = pickle.loads(view[start:start + size])
+            table.idx = meta["idx"]
+            columns: Dict[str, Column] = {
+                col: _load_column(view, col_meta, header["byteorder"])
+                for col, col_meta in meta["columns"].items()}
+            for column in columns.values():
+                column.keys = table.keys
+            table._columns = columns
+            for names, unique in meta.get("indexes", []):
+                table.create_index(names, unique=unique)
+            database[meta["name"]] = table
+    return database, header["extra"]
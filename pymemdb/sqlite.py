@@ -0,0 +1,153 @@
+"""Export to and import from sqlite with the sqlite3 module of the standard
+library. Rows are written with executemany in a single transaction."""
+
+import sqlite3
+from contextlib import contextmanager
+from typing import Generator, Iterable, List, Union
+
+from .column import Column
+from .storage import ArrayCells
+
+CONNECTION = Union[str, sqlite3.Connection]
+INDEXES = Union[bool, Iterable[str]]
+
+# set while loading, the previous values are restored afterwards
+BULK_PRAGMAS = {"synchronous": "OFF", "temp_store": "MEMORY"}
+
+_TYPES = [(int, "INTEGER"), (float, "REAL"),
+          (str, "TEXT"), (bytes, "BLOB")]
+
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+@contextmanager
+def connect(target: CONNECTION) -> Generator[sqlite3.Connection, None, None]:
+    """Yields 'target' if it is a connection, otherwise opens a connection to
+       the path 'target' and closes it afterwards."""
+    if isinstance(target, sqlite3.Connection):
+        yield target
+        return
+    conn = sqlite3.connect(str(target))
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@contextmanager
+def bulk_pragmas(conn: sqlite3.Connection) -> Generator[None, None, None]:
+    previous = {pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+                for pragma in BULK_PRAGMAS}
+    for pragma, val in BULK_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {val}")
+    try:
+        yield
+    finally:
+        for pragma, val in previous.items():
+            conn.execute(f"PRAGMA {pragma} = {val}")
+
+
+def infer_type(column: Column) -> str:
+    """Returns the sqlite type of the values in 'column' or "" if they have
+       no common type."""
+    if isinstance(column.cells, ArrayCells):
+        return "REAL" if column.cells.typecode in "fd" else "INTEGER"
+    values = column.values if column.index else column.cells.values()
+    value_types = set(map(type, values))
+    if column.n_missing:
+        value_types.add(type(column.default))
+    value_types.discard(type(None))
+    types = {next((name for typ, name in _TYPES if issubclass(value_type, typ)), "")
+             for value_type in value_types}
+    if types == {"INTEGER", "REAL"}:
+        return "REAL"
+    if len(types) == 1:
+        return types.pop()
+    return ""
+
+
+def table_names(conn: sqlite3.Connection) -> List[str]:
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                        "AND name NOT LIKE 'sqlite_%' ORDER BY rowid")
+    return [name for name, in rows]
+
+
+def write_table(table, target: CONNECTION, name: str, drop: bool = False,
+                chunk_size: int = 10000, indexes: INDEXES = False) -> None:
+    names = table.columns
+    columns = [table[col] for col in names]
+    definitions = []
+    for col, column in zip(names, columns):
+        definition = f"{quote(col)} {infer_type(column)}".rstrip()
+        if col == table.idx_name:
+            definition += " PRIMARY KEY"
+        definitions.append(definition)
+    insert = (f"INSERT INTO {quote(name)} ({', '.join(map(quote, names))}) "
+              f"VALUES ({', '.join('?' * len(names))})")
+
+    if isinstance(indexes, str):
+        raise TypeError("'indexes' must be a bool or an iterable of column "
+                        f"names, not the string {indexes!r}")
+    indexed = set(names) if indexes is True else set(indexes or ())
+    create_indexes = []
+    for col, column in zip(names, columns):
+        if col == table.idx_name:
+            continue
+        if column.unique:
+            create_indexes.append(f"CREATE UNIQUE INDEX IF NOT EXISTS "
+                                  f"{quote(f'ux_{name}_{col}')} ON "
+                                  f"{quote(name)} ({quote(col)})")
+        elif col in indexed and (indexes is not True or column.index):
+            create_indexes.append(f"CREATE INDEX IF NOT EXISTS "
+                                  f"{quote(f'ix_{name}_{col}')} ON "
+                                  f"{quote(name)} ({quote(col)})")
+    for columns, index in table._indexes.items():
+        if not index.unique and indexes is not True:
+            continue
+        kind = "UNIQUE INDEX" if index.unique else "INDEX"
+        prefix = "ux" if index.unique else "ix"
+        create_indexes.append(f"CREATE {kind} IF NOT EXISTS "
+                              f"{quote('_'.join([prefix, name, *columns]))} ON "
+                              f"{quote(name)} ({', '.join(map(quote, columns))})")
+
+    with connect(target) as conn, bulk_pragmas(conn):
+        with conn:
+            if drop:
+                conn.execute(f"DROP TABLE IF EXISTS {quote(name)}")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {quote(name)} "
+                         f"({', '.join(definitions)})")
+            for rows in table.iter_chunks(chunk_size, row_type=tuple):
+                conn.executemany(insert, rows)
+            # indexes are cheaper to build once after the load
+            for statement in create_indexes:
+                conn.execute(statement)
+
+
+def read_table(cls, target: CONNECTION, name: str, chunk_size: int = 10000,
+               index: bool = True):
+    with connect(target) as conn:
+        info = conn.execute(f"PRAGMA table_info({quote(name)})").fetchall()
+        if not info:
+            raise KeyError(f"Table {name} not in database!")
+        names = [row[1] for row in info]
+        pks = [row[1] for row in sorted(info, key=lambda row: row[5])
+               if row[5] > 0]
+        if len(pks) == 1:
+            primary_id = pks[0]
+        else:
+            # without a single primary key column the rows are numbered in
+            # a new column whose name is not taken by the sqlite table
+            primary_id = "id"
+            while primary_id in names:
+                primary_id = "_" + primary_id
+        table = cls(name, primary_id=primary_id, index=index)
+        for col in names:
+            if col not in table.columns:
+                table.create_column(col)
+
+        cursor = conn.execute(f"SELECT {', '.join(map(quote, names))} "
+                              f"FROM {quote(name)}")
+        table._load_tuples(names, iter(lambda: cursor.fetchmany(chunk_size), []))
+    return table
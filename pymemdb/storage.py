@@ -0,0 +1,200 @@
+from array import array
+from collections.abc import MutableMapping
+from typing import Hashable, Iterator, Optional, Sequence
+
+# a key may be at most this many slots (or the current length of the array,
+# if that is larger) behind the end of the array before the keys are
+# considered sparse
+MIN_GAP = 1024
+
+# array.array converts ints stored with a float typecode to float and bools
+# to int, cells only take values that come back unchanged
+_FLOAT_TYPECODES = "fd"
+_STR_TYPECODES = "uw"
+
+
+class SparseKeyError(KeyError):
+    """Raised by ArrayCells if a key would make the storage too sparse."""
+
+
+class ArrayCells(MutableMapping):
+    """Mapping of dense integer primary keys to numeric values.
+
+       The values are stored in a typed array.array, a bitmap records which
+       slots hold a value. Key 'k' lives in slot 'k - offset'. Setting a
+       key that does not fit the storage raises SparseKeyError and values
+       that do not fit the typecode raise TypeError or OverflowError, so the
+       owner can fall back to a dict. Values fit only if they have the
+       Python type of the typecode: float for "f" and "d", int (but not
+       bool) for the integer typecodes."""
+
+    def __init__(self, typecode: str) -> None:
+        self.typecode = typecode
+        self.value_type = (float if typecode in _FLOAT_TYPECODES else
+                           str if typecode in _STR_TYPECODES else int)
+        self.data = array(typecode)
+        self.valid = bytearray()
+        self.offset = 0
+        self._count = 0
+
+    @classmethod
+    def from_buffer(cls, typecode: str, data: memoryview, valid: bytearray,
+                    offset: int, count: int) -> "ArrayCells":
+        """Wraps 'data', e.g. a memoryview of a memory-mapped file, without
+           copying it. The values are copied into an array on the first
+           write."""
+        cells = cls(typecode)
+        cells.data = data  # type: ignore
+        cells.valid = valid
+        cells.offset = offset
+        cells._count = count
+        return cells
+
+    def _check_types(self, vals: Sequence[Hashable]) -> None:
+        if not set(map(type, vals)) <= {self.value_type}:
+            raise TypeError(f"Values for typecode '{self.typecode}' must be "
+                            f"of type {self.value_type.__name__}")
+
+    def _writable(self) -> None:
+        if not isinstance(self.data, array):
+            data = array(self.typecode)
+            data.frombytes(self.data.cast("B"))
+            self.data = data
+
+    def _slot(self, key: int) -> int:
+        if not isinstance(key, int):
+            raise SparseKeyError(key)
+        if not self.data and not self._count:
+            self.offset = key
+        i = key - self.offset
+        if i < 0 or i - len(self.data) > max(MIN_GAP, len(self.data)):
+            raise SparseKeyError(key)
+        return i
+
+    def _grow(self, size: int) -> None:
+        missing = size - len(self.data)
+        if missing > 0:
+            self.data.extend(array(self.typecode, bytes(missing * self.data.itemsize)))
+            self.valid.extend(bytes((size + 7) // 8 - len(self.valid)))
+
+    def _is_valid(self, i: int) -> bool:
+        return 0 <= i < len(self.data) and bool(self.valid[i >> 3] & (1 << (i & 7)))
+
+    def __getitem__(self, key: int) -> Hashable:
+        try:
+            i = key - self.offset
+        except TypeError:
+            raise KeyError(key) from None
+        if not self._is_valid(i):
+            raise KeyError(key)
+        return self.data[i]
+
+    def __contains__(self, key) -> bool:
+        try:
+            return self._is_valid(key - self.offset)
+        except TypeError:
+            return False
+
+    def __setitem__(self, key: int, val: Hashable) -> None:
+        i = self._slot(key)
+        self._check_types((val,))
+        self._writable()
+        if i >= len(self.data):
+            # check the value before growing the array
+            array(self.typecode, (val,))
+            self._grow(i + 1)
+        self.data[i] = val
+        if not self.valid[i >> 3] & (1 << (i & 7)):
+            self.valid[i >> 3] |= 1 << (i & 7)
+            self._count += 1
+
+    def __delitem__(self, key: int) -> None:
+        if key not in self:
+            raise KeyError(key)
+        i = key - self.offset
+        self.valid[i >> 3] &= ~(1 << (i & 7))
+        self._count -= 1
+
+    def __iter__(self) -> Iterator[int]:
+        offset = self.offset
+        for byte_no, byte in enumerate(self.valid):
+            if not byte:
+                continue
+            start = offset + (byte_no << 3)
+            for bit in range(8):
+                if byte & (1 << bit):
+                    yield start + bit
+
+    def __len__(self) -> int:
+        return self._count
+
+    def items(self):
+        data = self.data
+        offset = self.offset
+        for key in self:
+            yield key, data[key - offset]
+
+    def slice(self, pks: Sequence[int]) -> Optional[array]:
+        """Returns a copy of the values of 'pks' as an array if 'pks' are
+           consecutive keys that all hold a value, else None."""
+        if not pks or self._count != len(self.data):
+            return None
+        start = pks[0] - self.offset
+        stop = start + len(pks)
+        if start < 0 or stop > len(self.data) or pks[-1] - pks[0] != len(pks) - 1:
+            return None
+        if list(pks) != list(range(pks[0], pks[-1] + 1)):
+            return None
+        if not isinstance(self.data, array):
+            values = array(self.typecode)
+            values.frombytes(self.data[start:stop].cast("B"))
+            return values
+        return self.data[start:stop]
+
+    def take(self, pks: Sequence[int], default: Hashable) -> list:
+        """Returns the values of 'pks' or 'default' for keys without a
+           value. Runs without a Python call per key if the storage has no
+           holes and all keys lie within it."""
+        data = self.data
+        offset = self.offset
+        if pks and self._count == len(data) and isinstance(pks[0], int):
+            try:
+                inside = min(pks) >= offset and max(pks) < offset + len(data)
+            except TypeError:
+                inside = False
+            if inside:
+                return list(map(data.__getitem__, map(offset.__rsub__, pks)))
+        return [data[pk - offset] if pk in self else default for pk in pks]
+
+    def extend(self, pks: Sequence[int], vals: Sequence[Hashable]) -> bool:
+        """Appends 'vals' in one operation if 'pks' are consecutive and
+           continue right after the last slot. Returns False if they don't."""
+        if not pks or not isinstance(pks[0], int):
+            return False
+        if not self.data and not self._count:
+            self.offset = pks[0]
+        start = len(self.data)
+        if pks[0] - self.offset != start or pks[-1] - pks[0] != len(pks) - 1:
+            return False
+        if not isinstance(pks, range) and list(pks) != list(range(pks[0], pks[-1] + 1)):
+            return False
+        self._check_types(vals)
+        values = array(self.typecode, vals)
+        self._writable()
+        self.data.extend(values)
+        self.valid.extend(bytes((len(self.data) + 7) // 8 - len(self.valid)))
+        self._mark_valid(start, len(self.data))
+        self._count += len(pks)
+        return True
+
+    def _mark_valid(self, start: int, stop: int) -> None:
+        valid = self.valid
+        while start < stop and start & 7:
+            valid[start >> 3] |= 1 << (start & 7)
+            start += 1
+        full_bytes = (stop - start) >> 3
+        valid[start >> 3:(start >> 3) + full_bytes] = b"\xff" * full_bytes
+        start += full_bytes << 3
+        while start < stop:
+            valid[start >> 3] |= 1 << (start & 7)
+            start += 1
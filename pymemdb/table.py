@@ -1,11 +1,24 @@
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from collections.abc import Iterable
-from typing import Optional, Generator, Union, Hashable, List, Dict
+from functools import partial
+from itertools import chain, islice, repeat
+from typing import (TYPE_CHECKING, Callable, Optional, Generator, Union,
+                    Hashable, Iterator, List, Dict, Sequence, Tuple)
+import heapq
 import sys
 
-import dataset
-
 from pymemdb import Column, ColumnDoesNotExist
+from pymemdb.column import _gc_paused
+from pymemdb import aggregate as aggregation
+from pymemdb import sqlite
+from pymemdb.index import CompositeIndex
+from pymemdb.locks import RWLock, reading, writing
+from pymemdb.query import in_range, materialize, parse_operators, predicate
+
+if TYPE_CHECKING:  # pragma: no cover
+    # dataset pulls in SQLAlchemy, it is imported by pymemdb.dataset_io
+    # only when a table is loaded from or exported to dataset
+    import dataset
 
 
 version = sys.version_info
@@ -17,7 +30,12 @@ else:  # pragma: no cover
     from typing import Literal  # type: ignore
     ORDER_TYPE = Literal["ascending", "descending", False]  # type:ignore
 
-ROW_GEN = Generator[dict, None, None]
+ROW = Union[dict, tuple]
+ROWS = Union[Iterator[ROW], Dict[str, Sequence]]
+ROW_TYPE = Union[type, str]
+PROGRESS = Callable[[str, int, int], None]
+
+_NOTHING = object()
 
 
 class Table:
@@ -25,74 +43,221 @@ class Table:
        Can also used standalone"""
 
     def __init__(self, name: Optional[str] = None,
-                 primary_id: str = "id") -> None:
+                 primary_id: str = "id", index: bool = True,
+                 thread_safe: bool = False) -> None:
         self.name = name
         self.idx_name = primary_id
-        self._columns: defaultdict = defaultdict(Column)
+        self.default_index = index
+        self._columns: dict = dict()
         self.idx = 1
         self.keys: set = set()
+        self._record_types: dict = dict()
+        # indexes over several columns by the tuple of their column names
+        self._indexes: Dict[Tuple[str, ...], CompositeIndex] = dict()
+        # readers share the lock, writers hold it alone. Without it the
+        # table must not be changed while another thread reads it
+        self._lock: Optional[RWLock] = RWLock() if thread_safe else None
+        # called with a record of every change, set by a Database that
+        # keeps a write-ahead log
+        self.wal: Optional[Callable[[tuple], None]] = None
         self.create_column(name=self.idx_name, unique=True)
 
     @classmethod
-    def from_dataset(cls, table: dataset.table.Table, name=None) -> None:
+    def from_dataset(cls, table: "dataset.table.Table", name=None,
+                     chunk_size: int = 10000,
+                     columns: Optional[List[str]] = None,
+                     where: Optional[dict] = None) -> "Table":
+        """Loads a dataset table. Rows are streamed from the database with a
+           server-side cursor where the driver supports it and inserted
+           column-wise in chunks of 'chunk_size' rows.
+
+        Arguments:
+            table {dataset.table.Table} -- source table
+
+        Keyword Arguments:
+            name {Optional[str]} -- name of the new table, the name of the
+                source table if None (default: {None})
+            chunk_size {int} -- number of rows fetched and inserted at once
+                                (default: {10000})
+            columns {Optional[List[str]]} -- names of the columns to load.
+                The primary key is always loaded. All columns if None
+                (default: {None})
+            where {Optional[dict]} -- only load the rows matching these
+                filters, in the syntax of dataset's find (default: {None})
+
+        Raises:
+            ColumnDoesNotExist: [if a column in 'columns' does not exist]
+        """
+        from pymemdb import dataset_io
+        return dataset_io.read_table(cls, table, name=name,
+                                     chunk_size=chunk_size, columns=columns,
+                                     where=where)
+
+    def to_dataset(self, db: "dataset.Database", drop=False,
+                   chunk_size: int = 1000, name: Optional[str] = None,
+                   progress: Optional[PROGRESS] = None) -> None:
+        """Exports the table to a dataset database in a single transaction.
+           Rows are read from the columns and written with insert_many in
+           chunks, so memory use does not grow with the size of the table.
+
+        Arguments:
+            db {dataset.Database} -- target database
+
+        Keyword Arguments:
+            drop {bool} -- drop an existing table first (default: {False})
+            chunk_size {int} -- number of rows per insert (default: {1000})
+            name {Optional[str]} -- name of the target table, the name of
+                this table if None (default: {None})
+            progress {Optional[Callable[[str, int, int], None]]} -- called
+                after every chunk with the table name, the number of rows
+                written so far and the total number of rows
+                (default: {None})
+        """
+        from pymemdb import dataset_io
+        dataset_io.write_table(self, db, drop=drop, chunk_size=chunk_size,
+                               name=name, progress=progress)
+
+    def to_sqlite(self, target: sqlite.CONNECTION, name: Optional[str] = None,
+                  drop: bool = False, chunk_size: int = 10000,
+                  indexes: sqlite.INDEXES = False) -> None:
+        """Exports the table to sqlite with the sqlite3 module in a single
+           transaction. Unique columns and unique composite indexes get a
+           unique index.
+
+        Arguments:
+            target {Union[str, sqlite3.Connection]} -- path of the database
+                file or an open connection
+
+        Keyword Arguments:
+            name {Optional[str]} -- name of the target table, the name of
+                this table if None (default: {None})
+            drop {bool} -- drop an existing table first (default: {False})
+            chunk_size {int} -- number of rows per executemany
+                                (default: {10000})
+            indexes {Union[bool, Iterable[str]]} -- columns to create an
+                index on after the load, True for all indexed columns and
+                composite indexes (default: {False})
+
+        Raises:
+            ValueError: [if the table has no name and 'name' is None]
+            TypeError: [if 'indexes' is a string instead of column names]
+        """
+        name = self.name if name is None else name
         if name is None:
-            name = table.name
+            raise ValueError("Table has no name, pass 'name' to export it!")
+        sqlite.write_table(self, target, name, drop=drop,
+                           chunk_size=chunk_size, indexes=indexes)
 
-        pk = None
-        for col in table.table.columns:
-            if col.primary_key is True:
-                pk = col.name
-                break
+    @classmethod
+    def from_sqlite(cls, target: sqlite.CONNECTION, name: str,
+                    chunk_size: int = 10000, index: bool = True) -> "Table":
+        """Imports the table 'name' from sqlite. The primary key of the
+           sqlite table becomes the primary key of the new table. Tables
+           without a single primary key column get a new primary key column
+           "id", prefixed with underscores while that name is taken.
 
-        pymemdb_table = cls(name, primary_id=pk)
-        for row in table:
-            pymemdb_table.insert(row)
+        Arguments:
+            target {Union[str, sqlite3.Connection]} -- path of the database
+                file or an open connection
+            name {str} -- name of the table
 
-        return pymemdb_table
+        Keyword Arguments:
+            chunk_size {int} -- number of rows fetched at once
+                                (default: {10000})
+            index {bool} -- index new columns by default (default: {True})
 
-    def to_dataset(self, db: dataset.Database, drop=False):
-        if self.name in db.tables and drop:
-            db[self.name].drop()
-        if self.name not in db.tables:
-            db.create_table(self.name, primary_id=self.idx_name)
+        Raises:
+            KeyError: [if there is no table 'name']
+        """
+        return sqlite.read_table(cls, target, name, chunk_size=chunk_size,
+                                 index=index)
+
+    def iter_chunks(self, chunk_size: int = 1000,
+                    columns: Optional[List[str]] = None,
+                    row_type: type = dict) -> Generator[List[ROW], None, None]:
+        """Yields all rows of the table as lists of at most 'chunk_size'
+           rows, each chunk is assembled column by column.
 
-        with db as tx:
-            for row in self.all():
-                tx[self.name].insert(row)
+        Keyword Arguments:
+            chunk_size {int} -- maximum number of rows per chunk
+                                (default: {1000})
+            columns {Optional[List[str]]} -- names of the columns returned.
+                All columns if None (default: {None})
+            row_type {type} -- dict or tuple (default: {dict})
+        """
+        selected = self._select_columns(columns)
+        names = [col for col, _ in selected]
+        lock = self._lock
+        if lock is None:
+            keys = iter(self.keys)
+        else:
+            with lock.read():
+                keys = iter(list(self.keys))
+        while True:
+            pks = list(islice(keys, chunk_size))
+            if not pks:
+                return
+            if lock is None:
+                values = [column.take(pks) for _, column in selected]
+            else:
+                # the lock is only held per chunk, skip rows deleted since
+                with lock.read():
+                    pks = [pk for pk in pks if pk in self.keys]
+                    values = [column.take(pks) for _, column in selected]
+            if row_type is tuple:
+                yield list(zip(*values))
+            else:
+                yield [dict(zip(names, row)) for row in zip(*values)]
 
-    def all(self, ordered: ORDER_TYPE = False) -> ROW_GEN:
+    @reading
+    def all(self, ordered: ORDER_TYPE = False, order_by: Optional[str] = None,
+            limit: Optional[int] = None, offset: int = 0,
+            columns: Optional[List[str]] = None,
+            row_type: ROW_TYPE = dict) -> ROWS:
         """returns a generator of all rows of the table.
 
         Keyword Arguments:
             ordered {["ascending", "descending", False]} -- Can be set to
                 ascending or descending to sort by the primary id column
                 (default: {False})
+            order_by {Optional[str]} -- name of the column to sort by,
+                prefixed with "-" to sort descending (default: {None})
+            limit {Optional[int]} -- maximum number of rows returned
+                (default: {None})
+            offset {int} -- number of rows skipped (default: {0})
+            columns {Optional[List[str]]} -- names of the columns returned
+                for every row. All columns if None (default: {None})
+            row_type {[dict, tuple, "record", "columns"]} -- type of the
+                returned rows. "record" returns namedtuples, "columns"
+                returns a single dict that maps every column name to the
+                list (or array.array) of its values (default: {dict})
         Raises:
             ValueError: [if 'ordered' is not in {"ascending', 'descending',
-                                                 False}]
+                                                 False} or 'row_type' is
+                         invalid]
+            ColumnDoesNotExist: [if a column in 'columns' does not exist]
 
         Returns:
-            Generator -- [A Generator over all the rows in the table]
-
-        Yields:
-            dict -- [Dictionary that contains all elements of a row in the
-                     table]
+            Iterator -- [An Iterator over all the rows in the table or a
+                         dict of columns if row_type is "columns"]
         """
-        if ordered is False:
-            for i in self.keys:
-                yield self._get_row(i)
-        elif ordered == "ascending":
-            for i in sorted(self.keys):
-                yield self._get_row(i)
+        if ordered == "ascending":
+            order_by = self.idx_name
         elif ordered == "descending":
-            for i in sorted(self.keys, reverse=True):
-                yield self._get_row(i)
-        else:
+            order_by = f"-{self.idx_name}"
+        elif ordered is not False:
             raise ValueError("Value for kwarg 'ordered' not in [False, "
                              "ascending, descending] !")
+        return self._rows(self._ordered(None, order_by, limit, offset),
+                          columns, row_type)
 
+    @writing
     def create_column(self, name: str, default: Hashable = None,
-                      unique: bool = False) -> None:
+                      unique: bool = False,
+                      index: Optional[bool] = None,
+                      typecode: Optional[str] = None,
+                      sorted_index: bool = False,
+                      counts: bool = False) -> None:
         """Create a Column in the table.
 
         Arguments:
@@ -105,8 +270,136 @@ class Table:
                              column. If True, trying to insert a value more
                              than once will raise UniqueConstraintError
                              (default: {False})
+            index {Optional[bool]} -- If the column keeps an inverted index
+                                      of its values. Searches on unindexed
+                                      columns scan the column. Unique
+                                      columns are always indexed. None uses
+                                      the default of the table
+                                      (default: {None})
+            typecode {Optional[str]} -- array.array typecode (e.g. "q" or
+                                        "d") to store the cells of a numeric
+                                        column compactly while the primary
+                                        keys are dense. Falls back to a dict
+                                        for sparse keys or values that do
+                                        not fit the typecode, which are
+                                        values out of range and values of
+                                        another type, e.g. None, ints in a
+                                        "d" or bools in a "q" column
+                                        (default: {None})
+            sorted_index {bool} -- If the column keeps its values sorted to
+                                   answer range queries like
+                                   find(col={"gt": 10}) in O(log n + k).
+                                   Implies index=True (default: {False})
+            counts {bool} -- If an unindexed column keeps the number of
+                             cells per value, one entry per distinct value.
+                             Its values are then counted, planned and
+                             described by Table.stats without a scan.
+                             Indexed columns always are (default: {False})
+        """
+        if index is None:
+            index = self.default_index
+        column = Column(default=default, unique=unique, index=index,
+                        typecode=typecode, sorted_index=sorted_index,
+                        counts=counts)
+        column.keys = self.keys
+        self._columns[name] = column
+        if self.wal is not None:
+            self.wal(("create_column", name,
+                      {"default": default, "unique": unique, "index": index,
+                       "typecode": typecode, "sorted_index": sorted_index,
+                       "counts": counts}))
+
+    @writing
+    def create_index(self, columns: Union[str, List[str]],
+                     unique: bool = False) -> None:
+        """Creates an index over the combination of the values of several
+           columns. Searches for a single value in each of them are answered
+           with one lookup, e.g. find(a=1, b=2) with an index on ["a", "b"].
+
+        Arguments:
+            columns {Union[str, List[str]]} -- names of the columns
+
+        Keyword Arguments:
+            unique {bool} -- If every combination of values may only occur
+                             once. If True, inserts and updates that repeat
+                             a combination raise UniqueConstraintError
+                             (default: {False})
+
+        Raises:
+            ColumnDoesNotExist: [if a column does not exist]
+            UniqueConstraintError: [if unique and the rows already repeat a
+                                    combination. No index is created]
+            ValueError: [if an index on these columns already exists]
         """
-        self._columns[name] = Column(default=default, unique=unique)
+        names = (columns,) if isinstance(columns, str) else tuple(columns)
+        self._select_columns(list(names))
+        if names in self._indexes:
+            raise ValueError(f"Index on {list(names)} already exists!")
+        index = CompositeIndex(names, unique=unique)
+        pks = list(self.keys)
+        keys = self._index_keys(index, pks)
+        index.check(keys)
+        index.add_many(pks, keys)
+        self._indexes[names] = index
+        if self.wal is not None:
+            self.wal(("create_index", list(names), unique))
+
+    @writing
+    def create_sorted_index(self, col: str) -> None:
+        """Adds a sorted index to an existing column, see
+           Column.create_sorted_index.
+
+        Arguments:
+            col {str} -- name of the column
+
+        Raises:
+            ColumnDoesNotExist: [if the column does not exist]
+        """
+        self._select_columns([col])[0][1].create_sorted_index()
+        if self.wal is not None:
+            self.wal(("create_sorted_index", col))
+
+    @writing
+    def drop_index(self, columns: Union[str, List[str]]) -> None:
+        """Drops the index over 'columns'.
+
+        Raises:
+            KeyError: [if there is no index on these columns]
+        """
+        names = (columns,) if isinstance(columns, str) else tuple(columns)
+        if names not in self._indexes:
+            raise KeyError(f"No index on {list(names)}!")
+        del self._indexes[names]
+        if self.wal is not None:
+            self.wal(("drop_index", list(names)))
+
+    @property
+    def indexes(self) -> List[Tuple[str, ...]]:
+        """Returns the column names of all indexes created with
+           create_index."""
+        return list(self._indexes)
+
+    def _index_keys(self, index: CompositeIndex, pks: List) -> List[tuple]:
+        """Returns the keys of the stored rows 'pks' in 'index'."""
+        return list(zip(*[self._columns[col].take(pks)
+                          for col in index.columns]))
+
+    def _chunk_keys(self, index: CompositeIndex, pks: List,
+                    columns: Dict[str, Tuple[list, list]]) -> List[tuple]:
+        """Returns the keys in 'index' of the new rows 'pks' that are
+           about to be written from 'columns' by _write_columns."""
+        values: list = []
+        for col in index.columns:
+            default = self._columns[col].default
+            if col not in columns:
+                values.append(repeat(default, len(pks)))
+                continue
+            col_pks, vals = columns[col]
+            if len(col_pks) < len(pks):
+                given = dict(zip(col_pks, vals))
+                vals = [given.get(pk, default) for pk in pks]
+            values.append(vals)
+        return list(zip(*values))
 
     @property
     def columns(self) -> List[str]:
@@ -122,6 +415,7 @@ class Table:
         """Delete table."""
         del self
 
+    @writing
     def insert(self, row: Dict) -> int:
         """Inserts a row in the table. If a column is not present,
            it will be created with default value None
@@ -137,17 +431,168 @@ class Table:
         """
         if self.idx_name in row:
             idx = row[self.idx_name]
+            self._claim_pk(idx)
         else:
-            while self.idx in self.keys:
-                self.idx += 1
-            idx = self.idx
-        self.keys.add(idx)
+            idx = self._next_pk()
+        index_keys = [
+            (index, tuple(idx if col == self.idx_name else
+                          row[col] if col in row else self._columns[col].default
+                          for col in index.columns))
+            for index in self._indexes.values()]
+        for index, key in index_keys:
+            index.check([key])
         for key, val in row.items():
-            self._columns[key].insert(idx, val)
-        if self.idx_name not in row:
-            self._columns[self.idx_name].insert(idx, idx)
+            if key not in self._columns:
+                self.create_column(key)
+            elif self._columns[key].sorted_values is not None:
+                self._columns[key].check_sortable((val,))
+        self.keys.add(idx)
+        self._columns[self.idx_name].insert(idx, idx)
+        # columns without a value in 'row' derive the row as missing
+        for name, val in row.items():
+            if name != self.idx_name:
+                self._columns[name].insert(idx, val)
+        for index, key in index_keys:
+            index.add_many([idx], [key])
+        if self.wal is not None:
+            self.wal(("insert", {**row, self.idx_name: idx}))
         return idx
 
+    @writing
+    def insert_many(self, rows: Iterable, chunk_size: int = 10000) -> int:
+        """Inserts many rows into the table. The rows are consumed in chunks
+           of 'chunk_size' and every chunk is written column by column.
+
+        Arguments:
+            rows {Iterable[Dict]} -- iterable or generator of rows
+
+        Keyword Arguments:
+            chunk_size {int} -- number of rows inserted at once
+                                (default: {10000})
+
+        Raises:
+            UniqueConstraintError: [if constraint of a column is violated.
+                                    No row of the offending chunk is
+                                    inserted]
+
+        Returns:
+            int -- [number of rows inserted]
+        """
+        rows = iter(rows)
+        n_rows = 0
+        with _gc_paused():
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    return n_rows
+                self._insert_chunk(chunk)
+                n_rows += len(chunk)
+
+    def _insert_chunk(self, chunk: List[Dict]) -> List[int]:
+        pks = self._allocate_pks(chunk)
+        self._write_columns(pks, self._split_columns(chunk, pks))
+        return pks
+
+    def _load_tuples(self, names: List[str],
+                     chunks: Iterable) -> None:
+        with _gc_paused():
+            for rows in chunks:
+                self._insert_tuples(names, rows)
+
+    def _insert_tuples(self, names: List[str], rows: List[tuple]) -> None:
+        """Bulk inserts rows given as tuples of the values of 'names', e.g.
+           straight from a database cursor."""
+        if not rows:
+            return
+        values = dict(zip(names, map(list, zip(*rows))))
+        if self.idx_name in values:
+            pks = values[self.idx_name]
+            self._claim_max_pk(pks)
+        else:
+            pks = list(range(self.idx, self.idx + len(rows)))
+            self.idx += len(rows)
+        columns = {name: (pks, vals) for name, vals in values.items()}
+        columns[self.idx_name] = (pks, pks)
+        self._write_columns(pks, columns)
+
+    def _write_columns(self, pks: List[int],
+                       columns: Dict[str, Tuple[list, list]]) -> None:
+        for name, (_, vals) in columns.items():
+            if name == self.idx_name:
+                self._check_pks(pks)
+            elif name in self._columns:
+                self._columns[name].check_unique(vals)
+            if name in self._columns:
+                self._columns[name].check_sortable(vals)
+        index_keys = [(index, self._chunk_keys(index, pks, columns))
+                      for index in self._indexes.values()]
+        for index, keys in index_keys:
+            index.check(keys)
+        for name in columns:
+            if name not in self._columns:
+                self.create_column(name)
+        self.keys.update(pks)
+        for name, (col_pks, vals) in columns.items():
+            self._columns[name].insert_many(col_pks, vals)
+        for index, keys in index_keys:
+            index.add_many(pks, keys)
+        if self.wal is not None:
+            # the columns of rows with different keys are a defaultdict,
+            # which can not be pickled
+            self.wal(("write", pks, dict(columns)))
+
+    def _check_pks(self, pks: List[Hashable]) -> None:
+        """Checks the unique constraint of the primary key column for new
+           rows against the keys of the table, which leaves the index of
+           the column to the first search."""
+        if len(set(pks)) < len(pks) or not self.keys.isdisjoint(pks):
+            self._columns[self.idx_name].check_unique(pks)
+
+    def _next_pk(self) -> int:
+        idx = self.idx
+        self.idx += 1
+        return idx
+
+    def _claim_pk(self, pk: Hashable) -> None:
+        """Moves the auto increment counter past an explicitly given key, so
+           automatic keys never have to search for a free slot."""
+        if isinstance(pk, int) and pk >= self.idx:
+            self.idx = pk + 1
+
+    def _claim_max_pk(self, pks: List[Hashable]) -> None:
+        int_pks = [pk for pk in pks if isinstance(pk, int)]
+        if int_pks:
+            self._claim_pk(max(int_pks))
+
+    def _allocate_pks(self, chunk: List[Dict]) -> List[int]:
+        idx_name = self.idx_name
+        explicit = [row[idx_name] for row in chunk if idx_name in row]
+        if not explicit:
+            block = range(self.idx, self.idx + len(chunk))
+            self.idx = block.stop
+            return list(block)
+        self._claim_max_pk(explicit)
+        return [row[idx_name] if idx_name in row else self._next_pk()
+                for row in chunk]
+
+    def _split_columns(self, chunk: List[Dict],
+                       pks: List[int]) -> Dict[str, Tuple[list, list]]:
+        first = chunk[0].keys()
+        columns: dict
+        if all(map(first.__eq__, map(dict.keys, chunk))):
+            columns = {key: (pks, [row[key] for row in chunk])
+                       for key in first}
+        else:
+            columns = defaultdict(lambda: ([], []))
+            for pk, row in zip(pks, chunk):
+                for key, val in row.items():
+                    col_pks, vals = columns[key]
+                    col_pks.append(pk)
+                    vals.append(val)
+        columns[self.idx_name] = (pks, pks)
+        return columns
+
+    @writing
     def insert_ignore(self, row: Dict, keys: List[str], ignore_errors: bool = True) -> Optional[int]:
         """Inserts rows into the table. If another row is already present
            where all the values are identical for the fields in 'keys', the
@@ -165,15 +610,167 @@ class Table:
                               the insert was skipped]
 
         """
-        results = self.find(**{key: row[key] for key in keys}, ignore_errors=ignore_errors)
-        try:
-            next(results)
-        except StopIteration:
+        # a composite index on 'keys' answers this with a single lookup
+        if self._find_rows(ignore_errors=ignore_errors,
+                           **{key: row[key] for key in keys}):
+            return None
+        return self.insert(row)
+
+    @writing
+    def upsert(self, row: Dict, keys: List[str]) -> int:
+        """Updates the rows whose values in 'keys' equal those in 'row'
+           with the other values of 'row', or inserts 'row' if there is no
+           such row. Finding the rows takes a single lookup if 'keys' is one
+           indexed column or has a composite index.
+
+        Arguments:
+            row {Dict} -- [row to be inserted or merged into existing rows]
+            keys {List[str]} -- [columns that identify the row]
+
+        Raises:
+            UniqueConstraintError: [if constraint of a column is violated]
+            ValueError: [if a matching row would get another primary key]
+
+        Returns:
+            int -- [primary key of the inserted row or the smallest primary
+                    key of the updated rows]
+        """
+        keys = self._create_key_columns(keys)
+        lookup = self._index_lookup(keys)
+        if lookup is not None:
+            pks = list(lookup(tuple(row[key] for key in keys)))
+        else:
+            # "eq", so that lists or tuples are not read as "in"
+            pks = list(self._find_rows(**{key: {"eq": row[key]}
+                                          for key in keys}))
+        if not pks:
             return self.insert(row)
+        updates = {col: dict.fromkeys(pks, val) for col, val
+                   in self._upsert_values(row, keys, pks).items()}
+        if updates:
+            self._apply_updates(updates)
+        return min(pks)
+
+    @writing
+    def upsert_many(self, rows: Iterable, keys: List[str],
+                    chunk_size: int = 10000) -> int:
+        """Upserts many rows like Table.upsert, with the same result as
+           upserting them one after another. Every chunk of 'chunk_size'
+           rows is matched in one pass, then the matched rows are updated
+           and the others inserted column by column. Keys without an index
+           are indexed once per call.
+
+        Arguments:
+            rows {Iterable[Dict]} -- iterable or generator of rows
+            keys {List[str]} -- [columns that identify a row]
+
+        Keyword Arguments:
+            chunk_size {int} -- number of rows upserted at once
+                                (default: {10000})
+
+        Raises:
+            UniqueConstraintError: [if constraint of a column is violated.
+                                    No row of the offending chunk is
+                                    inserted, its updates may be applied]
+            ValueError: [if a matching row would get another primary key]
+
+        Returns:
+            int -- [number of rows inserted]
+        """
+        keys = self._create_key_columns(keys)
+        lookup = self._index_lookup(keys)
+        temporary = None
+        if lookup is None:
+            temporary = CompositeIndex(keys)
+            pks = list(self.keys)
+            temporary.add_many(pks, self._index_keys(temporary, pks))
+            lookup = temporary.find
+        rows = iter(rows)
+        n_inserted = 0
+        with _gc_paused():
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    return n_inserted
+                # rows to insert by their key, a later row with the same key
+                # is merged into them like an update after the insert
+                new_rows: Dict[tuple, dict] = {}
+                updates: dict = defaultdict(dict)
+                for row in chunk:
+                    key = tuple(row[col] for col in keys)
+                    if key in new_rows:
+                        pending = new_rows[key]
+                        if self.idx_name in row and row[self.idx_name] != \
+                                pending.get(self.idx_name, _NOTHING):
+                            raise ValueError(f"Primary key column "
+                                             f"'{self.idx_name}' can not be "
+                                             f"updated!")
+                        pending.update(row)
+                        continue
+                    pks = lookup(key)
+                    if not pks:
+                        new_rows[key] = dict(row)
+                        continue
+                    for col, val in self._upsert_values(row, keys, pks).items():
+                        updates[col].update(dict.fromkeys(pks, val))
+                if updates:
+                    self._apply_updates(updates)
+                if new_rows:
+                    pks = self._insert_chunk(list(new_rows.values()))
+                    if temporary is not None:
+                        temporary.add_many(pks, list(new_rows))
+                    n_inserted += len(new_rows)
+
+    def _upsert_values(self, row: Dict, keys: List[str],
+                       pks: Iterable) -> Dict:
+        """Returns the values of 'row' that update the matching rows 'pks'.
+           A primary key in 'row' is left out if it is the one of the
+           matching row."""
+        values = {col: val for col, val in row.items() if col not in keys}
+        if self.idx_name in values:
+            pk = values.pop(self.idx_name)
+            if any(other != pk for other in pks):
+                raise ValueError(f"Primary key column '{self.idx_name}' can "
+                                 f"not be updated!")
+        return values
+
+    def _create_key_columns(self, keys: List[str]) -> List[str]:
+        """Creates the missing columns of 'keys' and returns them in the
+           order of a composite index on the same columns, if there is
+           one."""
+        for key in keys:
+            if key not in self._columns:
+                self.create_column(key)
+        for names in self._indexes:
+            if set(names) == set(keys) and len(names) == len(keys):
+                return list(names)
+        return list(keys)
+
+    def _index_lookup(self, keys: List[str]
+                      ) -> Optional[Callable[[tuple], Iterable]]:
+        """Returns a function that maps a tuple of values of 'keys' to the
+           primary keys of the rows that hold them with a single index
+           lookup, or None if there is no such index."""
+        names = tuple(keys)
+        if names in self._indexes:
+            return self._indexes[names].find
+        if len(names) == 1 and self._columns[names[0]].index:
+            column = self._columns[names[0]]
+
+            # Table._find would read a list or tuple value as "in"
+            def lookup(key: tuple) -> set:
+                pks = column.find(key[0])
+                if key[0] == column.default and column.n_missing:
+                    return pks.union(column.missing)
+                return pks
+            return lookup
         return None
 
-    def find(self, ignore_errors: bool = True,
-             **kwargs) -> Generator[dict, None, None]:
+    @reading
+    def find(self, ignore_errors: bool = True, order_by: Optional[str] = None,
+             limit: Optional[int] = None, offset: int = 0,
+             columns: Optional[List[str]] = None,
+             row_type: ROW_TYPE = dict, **kwargs) -> ROWS:
         """finds rows in the table.
 
         Keyword Arguments:
@@ -182,24 +779,46 @@ class Table:
                         if value is in iterable, it matches a
                         SELECT * WHERE keyword IN val
                         search.
+                        if value is a dict, its keys are operators:
+                        "eq", "in", "gt", "gte", "lt", "lte" and
+                        "between" (inclusive (low, high) tuple), e.g.
+                        price={"gt": 10, "lte": 50}
             ignore_errors {bool} -- if True, it raises an error if a column
                                     does not exist in the table
                                     (default: {False})
+            order_by {Optional[str]} -- name of the column to sort by,
+                prefixed with "-" to sort descending (default: {None})
+            limit {Optional[int]} -- maximum number of rows returned
+                (default: {None})
+            offset {int} -- number of rows skipped (default: {0})
+            columns {Optional[List[str]]} -- names of the columns returned
+                for every row. All columns if None (default: {None})
+            row_type {[dict, tuple, "record", "columns"]} -- type of the
+                returned rows, see Table.all (default: {dict})
 
         Returns:
-            Generator[dict] -- [Generator over all rows that match the search]
+            Iterator -- [Iterator over all rows that match the search or a
+                         dict of columns if row_type is "columns"]
         """
         results = self._find_rows(ignore_errors=ignore_errors, **kwargs)
+        return self._rows(self._ordered(results, order_by, limit, offset),
+                          columns, row_type)
 
-        for idx in results:
-            yield {self.idx_name: idx, **self._get_row(idx)}
-
-    def find_one(self, ignore_errors: bool = False, **kwargs) -> Optional[dict]:
+    @reading
+    def find_one(self, ignore_errors: bool = False,
+                 order_by: Optional[str] = None,
+                 columns: Optional[List[str]] = None,
+                 **kwargs) -> Optional[dict]:
         """finds a single row from the table, if there is one.
         Keyword Arguments:
             ignore_errors {bool} -- if True, it raises an error if a column
                                     does not exist in the table
                                     (default: {False})
+            order_by {Optional[str]} -- returns the first row sorted by this
+                column, prefixed with "-" to sort descending
+                (default: {None})
+            columns {Optional[List[str]]} -- names of the columns returned.
+                All columns if None (default: {None})
 
         Returns:
             Optional[dict] -- single row from the table or None if there is
@@ -207,92 +826,633 @@ class Table:
         """
 
         try:
-            row = next(self.find(ignore_errors=ignore_errors, **kwargs))
+            row = next(self.find(ignore_errors=ignore_errors,
+                                 order_by=order_by, limit=1,
+                                 columns=columns, **kwargs))
         except StopIteration:
             return None
         return row
 
+    @reading
+    def count(self, ignore_errors: bool = True, **kwargs) -> int:
+        """Counts the rows that match the search in kwargs without building
+           them. A search for a value or a list of values of a single column
+           is answered from the index or the value counts of the column, if
+           it has one.
+
+        Keyword Arguments:
+            ignore_errors {bool} -- if False, it raises an error if a column
+                                    does not exist in the table
+                                    (default: {True})
+            **kwargs -- search as passed to Table.find. All rows are counted
+                        if it is empty
+
+        Returns:
+            int -- [number of matching rows]
+        """
+        if not kwargs:
+            return len(self.keys)
+        steps = self._plan(ignore_errors=ignore_errors, **kwargs)
+        if len(steps) == 1 and not isinstance(steps[0]["value"], dict) and (
+                steps[0]["method"] == "index"
+                or self._columns[steps[0]["column"]].counts is not None):
+            return steps[0]["estimate"]
+        return len(self._execute(steps))
+
+    @writing
     def delete(self, ignore_errors: bool = False, **kwargs) -> int:
-        pks = {row[self.idx_name] for row in self.find(**kwargs)}
+        """Deletes all rows that match the search in kwargs.
+
+        Keyword Arguments:
+            ignore_errors {bool} -- if False, it raises an error if no row
+                                    matches (default: {False})
+            **kwargs -- search as passed to Table.find
+
+        Raises:
+            KeyError: [if no row matches and ignore_errors is False]
+
+        Returns:
+            int -- [number of rows deleted]
+        """
+        # copy, the result may be a set of the index that is modified below
+        pks = set(self._find_rows(**kwargs))
         if len(pks) == 0 and not ignore_errors:
             raise KeyError(f"No matching rows found for {kwargs}")
-        for pk in pks:
-            self.keys.remove(pk)
-        for col in self._columns.values():
-            for pk in pks:
-                col.drop(pk)
+        self._delete_pks(pks)
+        return len(pks)
+
+    @writing
+    def delete_by_pk(self, pks: Iterable) -> int:
+        """Deletes rows by their primary keys without evaluating a search.
+           Keys that are not in the table are skipped.
+
+        Arguments:
+            pks {Iterable} -- primary keys of the rows to delete
+
+        Returns:
+            int -- [number of rows deleted]
+        """
+        pks = self.keys.intersection(pks)
+        self._delete_pks(pks)
         return len(pks)
 
+    def _delete_pks(self, pks: set) -> None:
+        if self._indexes:
+            pk_list = list(pks)
+            for index in self._indexes.values():
+                index.remove_many(pk_list, self._index_keys(index, pk_list))
+        self.keys.difference_update(pks)
+        for column in self._columns.values():
+            column.drop_many(pks)
+        if self.wal is not None:
+            self.wal(("delete", pks))
+
+    @writing
     def update(self, where: dict, **kwargs) -> int:
-        pks = self._find_rows(**where)
+        """Updates all rows that match 'where'.
+
+        Arguments:
+            where {dict} -- search as passed to Table.find
+
+        Keyword Arguments:
+            **kwargs -- keyword is the column name, value is the new value.
+                        If value is callable, it is called with the old
+                        value of every row and returns the new value,
+                        e.g. score=lambda old: old + 1
+
+        Raises:
+            UniqueConstraintError: [if constraint of a column is violated.
+                                    No row is updated]
+            ValueError: [if the primary key column is updated]
+
+        Returns:
+            int -- [number of rows updated]
+        """
+        # copy, the result may be a set of the index that is modified below
+        pks = list(self._find_rows(**where))
         if not pks:
             return 0
+        self._apply_updates(self._new_values(pks, kwargs))
+        return len(pks)
 
+    def _new_values(self, pks: List[Hashable], kwargs: dict
+                    ) -> Dict[str, Dict[int, Hashable]]:
+        """Returns the updates {column: {pk: value}} that set the values of
+           'kwargs' in the rows 'pks', calling callable values with the
+           old value."""
+        updates = {}
         for col, val in kwargs.items():
-            cell_dict = self._columns[col].cells
-            val_dict = self._columns[col].values
-            for pk in pks:
-                cell_dict[pk] = val
-                val_dict[val].add(pk)
-        return len(pks)
+            if callable(val):
+                find_value = self._column_or_default(col).find_value
+                updates[col] = {pk: val(find_value(pk)) for pk in pks}
+            else:
+                updates[col] = dict.fromkeys(pks, val)
+        return updates
+
+    @writing
+    def update_many(self, updates: Iterable) -> int:
+        """Updates single rows by their primary key.
+
+        Arguments:
+            updates {Iterable[Tuple[int, dict]]} -- (primary key, {column:
+                value}) tuples. Callable values are called with the old
+                value. Primary keys that are not in the table are skipped.
+
+        Raises:
+            UniqueConstraintError: [if constraint of a column is violated.
+                                    No row is updated]
+            ValueError: [if the primary key column is updated]
+
+        Returns:
+            int -- [number of rows updated]
+        """
+        by_column: dict = defaultdict(dict)
+        updated = set()
+        for pk, row in updates:
+            if pk not in self.keys:
+                continue
+            updated.add(pk)
+            for col, val in row.items():
+                if callable(val):
+                    old = by_column[col].get(
+                        pk, self._column_or_default(col).find_value(pk))
+                    val = val(old)
+                by_column[col][pk] = val
+        self._apply_updates(by_column)
+        return len(updated)
+
+    def _column_or_default(self, col: str) -> Column:
+        """Returns the column or an empty stand-in whose values are None."""
+        return self._columns[col] if col in self._columns else Column()
+
+    def _apply_updates(self, updates: Dict[str, Dict[int, Hashable]]) -> None:
+        if self.idx_name in updates:
+            raise ValueError(f"Primary key column '{self.idx_name}' can not "
+                             f"be updated!")
+        for col, col_updates in updates.items():
+            if col in self._columns:
+                self._columns[col].check_unique_update(col_updates)
+                self._columns[col].check_sortable(col_updates.values())
+        index_updates = self._index_updates(updates)
+        for col, col_updates in updates.items():
+            if col not in self._columns:
+                self.create_column(col)
+            self._columns[col].update_many(col_updates)
+        for index, pks, old_keys, new_keys in index_updates:
+            index.remove_many(pks, old_keys)
+            index.add_many(pks, new_keys)
+        if self.wal is not None:
+            self.wal(("update", updates))
+
+    def _index_updates(self, updates: Dict[str, Dict[int, Hashable]]
+                       ) -> List[Tuple[CompositeIndex, list, list, list]]:
+        """Returns (index, primary keys, old keys, new keys) for every
+           index that 'updates' change and checks their unique
+           constraints."""
+        changes = []
+        for index in self._indexes.values():
+            updated = [updates[col] for col in index.columns if col in updates]
+            if not updated:
+                continue
+            pks = list(set().union(*updated))
+            old_values = [self._columns[col].take(pks) for col in index.columns]
+            new_values = []
+            for col, vals in zip(index.columns, old_values):
+                if col in updates:
+                    col_updates = updates[col]
+                    vals = [col_updates.get(pk, val) for pk, val in zip(pks, vals)]
+                new_values.append(vals)
+            new_keys = list(zip(*new_values))
+            index.check(new_keys, replaced=set(pks))
+            changes.append((index, pks, list(zip(*old_values)), new_keys))
+        return changes
 
-    def update_replace(self, where: dict, **kwargs):
-        n_rows = self.update(where=where, **kwargs)
-        if n_rows == 0:
+    @writing
+    def update_replace(self, where: dict, **kwargs) -> int:
+        """Updates all rows that match 'where' like Table.update and then
+           deletes rows that became duplicates of another row. The updated
+           rows are compared with each other and with the rows that match
+           'where' in the other columns and hold the new values, including
+           those returned by callables. The row with the smallest primary
+           key is kept.
+
+        Arguments:
+            where {dict} -- search as passed to Table.find
+
+        Keyword Arguments:
+            **kwargs -- new values as passed to Table.update
+
+        Returns:
+            int -- [number of rows deleted]
+        """
+        # copy, the result may be a set of the index that is modified below
+        pks = list(self._find_rows(**where))
+        if not pks:
             return 0
+        updates = self._new_values(pks, kwargs)
+        self._apply_updates(updates)
+
+        # other rows can only equal an updated row if they hold one of the
+        # new values in every updated column and match the rest of 'where'
+        new_where = {col: val for col, val in where.items()
+                     if col not in updates}
+        new_where.update({col: list(set(col_updates.values()))
+                          for col, col_updates in updates.items()})
+        candidates = set(pks).union(self._find_rows(**new_where))
+        return self._deduplicate(candidates, None, "min")
+
+    @reading
+    def aggregate(self, group_by: Optional[Union[str, List[str]]] = None,
+                  count: bool = False,
+                  sum: Optional[Union[str, List[str]]] = None,
+                  min: Optional[Union[str, List[str]]] = None,
+                  max: Optional[Union[str, List[str]]] = None,
+                  mean: Optional[Union[str, List[str]]] = None,
+                  where: Optional[dict] = None) -> List[dict]:
+        """Aggregates the rows per group of equal values in 'group_by'.
+           Counting by a single indexed column only reads its index, the
+           other aggregates run over the column stores. None values are
+           ignored by sum, min, max and mean.
+
+        Keyword Arguments:
+            group_by {Optional[Union[str, List[str]]]} -- column(s) to group
+                by. All rows form one group if None (default: {None})
+            count {bool} -- count the rows per group as "count"
+                            (default: {False})
+            sum {Optional[Union[str, List[str]]]} -- column(s) to sum up as
+                "sum_<column>" (default: {None})
+            min {Optional[Union[str, List[str]]]} -- column(s) to find the
+                minimum of as "min_<column>" (default: {None})
+            max {Optional[Union[str, List[str]]]} -- column(s) to find the
+                maximum of as "max_<column>" (default: {None})
+            mean {Optional[Union[str, List[str]]]} -- column(s) to average
+                as "mean_<column>" (default: {None})
+            where {Optional[dict]} -- only aggregate the rows matching this
+                search as passed to Table.find (default: {None})
+
+        Raises:
+            ColumnDoesNotExist: [if a column does not exist]
+
+        Returns:
+            List[dict] -- [one dict per group with the values of 'group_by'
+                           and the aggregates, in no particular order]
+        """
+        def as_list(cols):
+            if cols is None:
+                return []
+            return [cols] if isinstance(cols, str) else list(cols)
+
+        group_cols = as_list(group_by)
+        aggregates = [(func, col) for func, cols in
+                      [("sum", sum), ("min", min), ("max", max), ("mean", mean)]
+                      for col in as_list(cols)]
+        self._select_columns(group_cols + [col for _, col in aggregates])
+        pks = None if where is None else set(self._find_rows(**where))
+        return aggregation.aggregate(self, group_cols, count, aggregates, pks)
+
+    @reading
+    def value_counts(self, col: str,
+                     where: Optional[dict] = None) -> Dict[Hashable, int]:
+        """Returns the number of rows per value of 'col', most frequent
+           first. Indexed columns are counted from their index.
+
+        Arguments:
+            col {str} -- name of the column
+
+        Keyword Arguments:
+            where {Optional[dict]} -- only count the rows matching this
+                search as passed to Table.find (default: {None})
 
-        new_where = {**where, **kwargs}
-        rows = self.find(**new_where)
-        result_counter = defaultdict(frozenset)
-        for row in rows:
-            pk = row[self.idx_name]
-            del row[self.idx_name]
-            r = result_counter[tuple(row.items())]
-            result_counter[tuple(row.items())] = r.union({pk})
-
-        rowcount = 0
-        for pks in result_counter.values():
-            if len(pks) < 2:
+        Raises:
+            ColumnDoesNotExist: [if the column does not exist]
+        """
+        column = self._select_columns([col])[0][1]
+        pks = None if where is None else set(self._find_rows(**where))
+        return dict(aggregation.value_counts(column, pks).most_common())
+
+    @reading
+    def distinct(self, col: str, where: Optional[dict] = None) -> List[Hashable]:
+        """Returns the distinct values of 'col' in no particular order.
+
+        Arguments:
+            col {str} -- name of the column
+
+        Keyword Arguments:
+            where {Optional[dict]} -- only consider the rows matching this
+                search as passed to Table.find (default: {None})
+
+        Raises:
+            ColumnDoesNotExist: [if the column does not exist]
+        """
+        column = self._select_columns([col])[0][1]
+        pks = None if where is None else set(self._find_rows(**where))
+        return list(aggregation.value_counts(column, pks))
+
+    @reading
+    def stats(self, col: str) -> Dict[str, Hashable]:
+        """Returns the statistics of a column, see Column.stats. Indexed
+           columns and columns created with counts=True keep them up to
+           date on every change, so this does not read any rows. Other
+           unindexed columns count their cells on every call.
+
+        Arguments:
+            col {str} -- name of the column
+
+        Raises:
+            ColumnDoesNotExist: [if the column does not exist]
+        """
+        return self._select_columns([col])[0][1].stats()
+
+    @writing
+    def deduplicate(self, subset: Optional[List[str]] = None,
+                    keep: str = "min", where: Optional[dict] = None) -> int:
+        """Deletes rows whose values are identical to those of another row.
+
+        Keyword Arguments:
+            subset {Optional[List[str]]} -- columns that are compared. All
+                columns but the primary key if None (default: {None})
+            keep {["min", "max"]} -- keep the row with the smallest or the
+                largest primary key of every group of duplicates
+                (default: {"min"})
+            where {Optional[dict]} -- only rows that match this search are
+                compared. All rows if None (default: {None})
+
+        Raises:
+            ValueError: [if keep is not "min" or "max"]
+            ColumnDoesNotExist: [if a column in 'subset' does not exist]
+
+        Returns:
+            int -- [number of rows deleted]
+        """
+        if keep not in ("min", "max"):
+            raise ValueError("Value for kwarg 'keep' not in [min, max] !")
+        pks = self.keys if not where else self._find_rows(**where)
+        return self._deduplicate(pks, subset, keep)
+
+    def _deduplicate(self, pks: Iterable[Hashable],
+                     subset: Optional[List[str]], keep: str) -> int:
+        """Deletes the rows among 'pks' that are duplicates of another row
+           among 'pks' in the columns 'subset'."""
+        if subset is None:
+            subset = [col for col in self._columns if col != self.idx_name]
+        selected = self._select_columns(subset)
+        pks = list(pks)
+
+        keys = zip(*[column.take(pks) for _, column in selected])
+        kept: dict = {}
+        duplicates = []
+        for key, pk in zip(keys, pks):
+            other = kept.setdefault(key, pk)
+            if other == pk:
                 continue
-            keep = min(pks)
-            pks = pks.difference({keep})
-            n = self.delete(**{self.idx_name: pks})
-            rowcount += n
+            if (pk < other) == (keep == "min"):
+                kept[key] = pk
+                duplicates.append(other)
+            else:
+                duplicates.append(pk)
 
-        return rowcount
+        self._delete_pks(set(duplicates))
+        return len(duplicates)
 
-    def _get_row(self, idx: int) -> dict:
-        row = {col: self._columns[col].find_value(idx) for col in self.columns}
-        row = {self.idx_name: idx, **row}
-        return row
+    def _ordered(self, pks: Optional[set], order_by: Optional[str],
+                 limit: Optional[int], offset: int) -> Iterable:
+        """Orders and slices the primary keys 'pks' (all rows if None).
+           Columns with a sorted index are streamed from the index, other
+           columns are sorted with heapq if only the top rows are needed.
+           None sorts last in ascending and first in descending order."""
+        stop = None if limit is None else offset + limit
+        if order_by is None:
+            return islice(self.keys if pks is None else pks, offset, stop)
+
+        descending = order_by.startswith("-")
+        name = order_by[1:] if descending else order_by
+        if name not in self._columns:
+            raise KeyError(f"Column {name} not in Table!")
+        column = self._columns[name]
+
+        if column.sorted_values is not None and (
+                pks is None or len(pks) >= len(column.values)):
+            return islice(self._stream_sorted(column, pks, descending),
+                          offset, stop)
+
+        find_value = column.find_value
+
+        def key(pk):
+            val = find_value(pk)
+            return (val is None, val)
+
+        if name == self.idx_name:
+            key = None  # type: ignore
+        pks = self.keys if pks is None else pks
+        if stop is None:
+            return iter(sorted(pks, key=key, reverse=descending)[offset:])
+        top = heapq.nlargest if descending else heapq.nsmallest
+        return iter(top(stop, pks, key=key)[offset:])
+
+    def _stream_sorted(self, column: Column, pks: Optional[set],
+                       descending: bool) -> Generator[int, None, None]:
+        missing = column.missing
+        default = column.default
+
+        def groups():
+            vals: Iterable = column.sorted_values
+            if descending:
+                vals = reversed(column.sorted_values)
+            if missing and default is not None:
+                vals = heapq.merge(vals, [default], reverse=descending)
+            last = _NOTHING
+            for val in vals:
+                if last is not _NOTHING and val == last:
+                    continue
+                last = val
+                group = column.values.get(val, set())
+                yield group.union(missing) if val == default else group
+
+        def none_group():
+            group = column.values.get(None, set())
+            yield group.union(missing) if default is None else group
+
+        ordered = chain(none_group(), groups()) if descending \
+            else chain(groups(), none_group())
+        for group in ordered:
+            if pks is not None:
+                group = group.intersection(pks)
+            yield from sorted(group)
+
+    def _rows(self, pks: Iterable, columns: Optional[List[str]],
+              row_type: ROW_TYPE) -> ROWS:
+        selected = self._select_columns(columns)
+        if row_type == "columns":
+            pks = list(pks)
+            return {col: column.take(pks) for col, column in selected}
+        return map(self._row_factory(selected, row_type), pks)
+
+    def _select_columns(self, columns: Optional[List[str]]) -> List[Tuple[str, Column]]:
+        if columns is None:
+            return list(self._columns.items())
+        for col in columns:
+            if col not in self._columns:
+                raise ColumnDoesNotExist(f"Column {col} does not exist!")
+        return [(col, self._columns[col]) for col in columns]
+
+    def _row_factory(self, selected: List[Tuple[str, Column]],
+                     row_type: ROW_TYPE = dict) -> Callable[[int], ROW]:
+        """Returns a function that builds the row of a primary key from the
+           'selected' (name, Column) pairs."""
+        if row_type is dict:
+            def get_row(idx: int) -> ROW:
+                return {col: column.find_value(idx) for col, column in selected}
+            return get_row
+
+        getters = [column.find_value for _, column in selected]
+        if row_type is tuple:
+            make: Callable = tuple
+        elif row_type == "record":
+            record_type = self._record_type(tuple(col for col, _ in selected))
+            make = partial(tuple.__new__, record_type)
+        else:
+            raise ValueError(f"Invalid row_type {row_type!r}! Valid are "
+                             f"dict, tuple, 'record' and 'columns'")
+
+        def get_row(idx: int) -> ROW:  # type: ignore
+            return make([getter(idx) for getter in getters])
+        return get_row
+
+    def _record_type(self, names: Tuple[str, ...]) -> type:
+        if names not in self._record_types:
+            self._record_types[names] = namedtuple("Row", names, rename=True)
+        return self._record_types[names]
 
     def _find(self, col: str, val: Hashable) -> set:
+        if isinstance(col, tuple):
+            return self._indexes[col].find(val)
+        if isinstance(val, dict):
+            return self._find_operators(col, val)
+        column = self._columns[col]
         if isinstance(val, Iterable) and not isinstance(val, str):
-            results: set = set()
-            for v in val:
-                results.update(self._columns[col].find(v))
-            return results
-        return self._columns[col].find(val)
+            vals = set(val)
+            results = column.find_many(vals)
+        else:
+            vals = {val}
+            results = column.find(val)
+        if column.default in vals:
+            results = results.union(column.missing)
+        return results
 
-    def _find_rows(self, ignore_errors: bool = True, **kwargs) -> set:
-        results: set = set()
+    def _find_operators(self, col: str, query: dict) -> set:
+        bounds, members = parse_operators(query)
+        results: Optional[set] = None
+        for vals in members:
+            pks = self._find(col, vals)
+            results = pks if results is None else results.intersection(pks)
+        if bounds:
+            column = self._columns[col]
+            pks = column.find_range(bounds)
+            if in_range(column.default, bounds):
+                pks = pks.union(column.missing)
+            results = pks if results is None else results.intersection(pks)
+        return results if results is not None else set()
+
+    def _filter(self, pks: set, col: str, val: Hashable) -> set:
+        find_value = self._columns[col].find_value
+        matches = predicate(val)
+        return {pk for pk in pks if matches(find_value(pk))}
+
+    def _plan(self, ignore_errors: bool = True, **kwargs) -> List[dict]:
+        """Orders the predicates by their estimated number of matches,
+           indexed ones before scans. The first step fetches its rows, every
+           later step only checks the rows that are left: 'intersect' probes
+           the inverted index with them, 'probe' compares their cell
+           values."""
+        steps = []
         for col, val in kwargs.items():
             if col not in self._columns:
                 if ignore_errors:
                     continue
                 else:
                     raise KeyError(f"Column {col} not in Table!")
-            if len(results) == 0:
-                results = self._find(col, val)
+            column = self._columns[col]
+            # estimating must not use up iterators the search reads later
+            val = materialize(val)
+            estimate = column.estimate(val)
+            indexed = column.index and estimate is not None
+            steps.append({"column": col, "value": val,
+                          "estimate": len(self) if estimate is None else estimate,
+                          "method": "index" if indexed else "scan"})
+        steps = self._plan_composite(steps)
+        # a scan reads every row however few it matches, so indexed
+        # predicates go first
+        steps.sort(key=lambda step: (step["method"] == "scan", step["estimate"]))
+        for step in steps[1:]:
+            val = step["value"]
+            if isinstance(step["column"], tuple):
+                step["method"] = "intersect"
+            elif self._columns[step["column"]].index and (
+                    isinstance(val, str) or not isinstance(val, Iterable)):
+                step["method"] = "intersect"
             else:
-                pk = self._find(col, val)
-                results = results.intersection(pk)
-            if val == self._columns[col].default:
-                column_cells = set(self._columns[col].cells)
-                mis_def_keys = self.keys.symmetric_difference(column_cells)
-                results.update(mis_def_keys)
+                step["method"] = "probe"
+        return steps
+
+    def _plan_composite(self, steps: List[dict]) -> List[dict]:
+        """Replaces the steps that search a single value in every column of
+           a composite index by one lookup in the index with the fewest
+           matches."""
+        if not self._indexes:
+            return steps
+        single = {step["column"]: step["value"] for step in steps
+                  if isinstance(step["value"], str)
+                  or not isinstance(step["value"], Iterable)}
+        best = None
+        for names, index in self._indexes.items():
+            if all(col in single for col in names):
+                key = tuple(single[col] for col in names)
+                estimate = len(index.find(key))
+                if best is None or estimate < best["estimate"]:
+                    best = {"column": names, "value": key,
+                            "estimate": estimate, "method": "index"}
+        if best is None:
+            return steps
+        return [step for step in steps
+                if step["column"] not in best["column"]] + [best]
+
+    @reading
+    def explain(self, ignore_errors: bool = True, **kwargs) -> List[dict]:
+        """Returns the plan Table.find uses for the search in kwargs.
+
+        Returns:
+            List[dict] -- [one dict per predicate in execution order with
+                           the keys "column", "value", "estimate" (estimated
+                           number of matching rows) and "method" ("index",
+                           "scan", "intersect" or "probe"). A lookup in a
+                           composite index has a tuple of column names and
+                           a tuple of values]
+        """
+        return self._plan(ignore_errors=ignore_errors, **kwargs)
+
+    def _find_rows(self, ignore_errors: bool = True, **kwargs) -> set:
+        return self._execute(self._plan(ignore_errors=ignore_errors, **kwargs))
+
+    def _execute(self, steps: List[dict]) -> set:
+        """Returns the primary keys of the rows that match a plan."""
+        if not steps or steps[0]["estimate"] == 0:
+            return set()
+
+        results = self._find(steps[0]["column"], steps[0]["value"])
+        for step in steps[1:]:
             if not results:
                 return set()
+            col, val = step["column"], step["value"]
+            if step["method"] == "intersect" and isinstance(col, tuple):
+                results = results.intersection(self._indexes[col].find(val))
+            elif step["method"] == "intersect":
+                column = self._columns[col]
+                matched = results.intersection(column.find(val))
+                if val == column.default:
+                    matched.update(results.intersection(column.missing))
+                results = matched
+            else:
+                results = self._filter(results, col, val)
         return results
 
     def __eq__(self, other):
@@ -303,10 +1463,15 @@ class Table:
             raise ColumnDoesNotExist("Column {col} does not exist!")
         return self._columns[col]
 
+    @writing
     def __delitem__(self, col):
         if col not in self._columns:
             raise ColumnDoesNotExist(f"Column {col} does not exist!")
         del self._columns[col]
+        self._indexes = {names: index for names, index in self._indexes.items()
+                         if col not in names}
+        if self.wal is not None:
+            self.wal(("drop_column", col))
 
     def __len__(self):
         return len(self.keys)
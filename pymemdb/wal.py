@@ -0,0 +1,295 @@
+"""Write-ahead log for a Database that is persisted to a snapshot file.
+
+Every change to a table is appended as a pickled record, framed by its
+length and CRC32, to the current log segment '<snapshot>.<n>.wal'. A
+database opened with Database.open loads the snapshot and replays the
+segments that are newer than it. Compaction closes the current segment and
+folds all closed segments into a new snapshot in a background thread, so
+writers only wait for the switch to the next segment."""
+
+import os
+import pickle
+import re
+import struct
+import threading
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+from . import snapshot
+from .storage import ArrayCells
+
+SYNC_MODES = ("always", "batch", "never")
+
+_FRAME = struct.Struct("<II")
+
+RECORD = tuple
+
+
+def segment_path(path: str, segment: int) -> str:
+    return f"{path}.{segment}.wal"
+
+
+def segments(path: str) -> List[int]:
+    """Returns the numbers of all log segments of the snapshot 'path' in
+       ascending order."""
+    directory, name = os.path.split(os.path.abspath(path))
+    pattern = re.compile(re.escape(name) + r"\.(\d+)\.wal$")
+    matches = map(pattern.match, os.listdir(directory))
+    return sorted(int(match.group(1)) for match in matches if match)
+
+
+def read_segment(path: str) -> Iterator[RECORD]:
+    """Yields the records of a log segment. A torn or corrupt record at the
+       end, e.g. from a crash during a write, ends the log and is cut off."""
+    with open(path, "rb") as file:
+        data = file.read()
+    pos = 0
+    while pos + _FRAME.size <= len(data):
+        size, crc = _FRAME.unpack_from(data, pos)
+        start = pos + _FRAME.size
+        record = data[start:start + size]
+        if len(record) < size or zlib.crc32(record) != crc:
+            break
+        yield pickle.loads(record)
+        pos = start + size
+    if pos < len(data):
+        with open(path, "r+b") as file:
+            file.truncate(pos)
+
+
+def _insert(table, row):
+    table.insert(row)
+
+
+def _write(table, pks, columns):
+    table._claim_max_pk(pks)
+    table._write_columns(pks, columns)
+
+
+def _insert_tuples(table, names, rows):
+    table._insert_tuples(names, rows)
+
+
+def _update(table, updates):
+    table._apply_updates(updates)
+
+
+def _delete(table, pks):
+    table._delete_pks(pks)
+
+
+def _create_column(table, name, options):
+    table.create_column(name, **options)
+
+
+def _drop_column(table, name):
+    del table[name]
+
+
+def _create_index(table, columns, unique):
+    table.create_index(columns, unique=unique)
+
+
+def _drop_index(table, columns):
+    table.drop_index(columns)
+
+
+def _create_sorted_index(table, col):
+    table.create_sorted_index(col)
+
+
+_TABLE_OPS = {"insert": _insert, "write": _write,
+              "insert_tuples": _insert_tuples, "update": _update,
+              "delete": _delete, "create_column": _create_column,
+              "drop_column": _drop_column, "create_index": _create_index,
+              "drop_index": _drop_index,
+              "create_sorted_index": _create_sorted_index}
+
+
+def column_options(column) -> dict:
+    """Returns the keyword arguments of Table.create_column that recreate
+       'column' without its cells."""
+    cells = column.cells
+    return {"default": column.default, "unique": column.unique,
+            "index": column.index,
+            "typecode": cells.typecode if isinstance(cells, ArrayCells) else None,
+            "sorted_index": column.sorted_values is not None,
+            "counts": column.counts is not None}
+
+
+def log_table(log: "WriteAheadLog", name: str, table,
+              chunk_size: int = 10000) -> None:
+    """Records a complete copy of 'table' under 'name'."""
+    log.log(name, ("create_table", table.idx_name, table.default_index))
+    for col in table.columns:
+        if col != table.idx_name:
+            log.log(name, ("create_column", col, column_options(table[col])))
+    names = table.columns
+    for rows in table.iter_chunks(chunk_size, row_type=tuple):
+        log.log(name, ("insert_tuples", names, rows))
+    for columns, index in table._indexes.items():
+        log.log(name, ("create_index", list(columns), index.unique))
+
+
+def replay(database, records: Iterator[RECORD]) -> int:
+    """Applies log records to 'database' and returns their number."""
+    n_records = 0
+    for name, op, *args in records:
+        if op == "create_table":
+            database.create_table(name, *args)
+        elif op == "drop_table":
+            database.drop_table(name)
+        else:
+            _TABLE_OPS[op](database._tables[name], *args)
+        n_records += 1
+    return n_records
+
+
+class WriteAheadLog:
+    """Appends records to the current log segment of the snapshot 'path'.
+
+       sync="always" writes and fsyncs every record before log returns,
+       concurrent writers share one fsync (group commit). sync="batch"
+       buffers up to 'batch_size' records and writes and fsyncs them
+       together, flush writes the buffer earlier. sync="never" writes in
+       batches as well but leaves syncing to the operating system. If
+       'compact_size' is given, a compaction starts whenever the current
+       segment grows beyond that many bytes."""
+
+    def __init__(self, database_cls, path: str, segment: int,
+                 sync: str = "batch", batch_size: int = 1000,
+                 compact_size: Optional[int] = None) -> None:
+        if sync not in SYNC_MODES:
+            raise ValueError(f"Unknown sync mode '{sync}'! Valid modes are "
+                             f"{list(SYNC_MODES)}")
+        self.database_cls = database_cls
+        self.path = path
+        self.sync = sync
+        self.batch_size = batch_size
+        self.compact_size = compact_size
+        self.segment = segment
+        self._file = open(segment_path(path, segment), "ab")
+        self._size = self._file.tell()
+        self._buffer: List[bytes] = []
+        self._seq = 0
+        self._flushed = 0
+        # guards the buffer, held only to append to it or to take it
+        self._lock = threading.Lock()
+        # held while writing to the file, the writer that gets it first
+        # writes the records of everyone waiting (group commit)
+        self._flush_lock = threading.RLock()
+        self._compaction: Optional[threading.Thread] = None
+
+    def log(self, table: str, record: RECORD) -> None:
+        data = pickle.dumps((table, *record), protocol=pickle.HIGHEST_PROTOCOL)
+        frame = _FRAME.pack(len(data), zlib.crc32(data)) + data
+        with self._lock:
+            self._buffer.append(frame)
+            self._seq += 1
+            seq = self._seq
+            n_buffered = len(self._buffer)
+        if self.sync == "always" or n_buffered >= self.batch_size:
+            self.flush(seq)
+        if self.compact_size is not None and self._size >= self.compact_size:
+            self.compact()
+
+    def flush(self, seq: Optional[int] = None) -> None:
+        """Writes all buffered records, or returns as soon as the records up
+           to number 'seq' are written, and fsyncs them unless
+           sync="never"."""
+        with self._flush_lock:
+            if seq is not None and seq <= self._flushed:
+                return
+            with self._lock:
+                frames, self._buffer = self._buffer, []
+                last = self._seq
+            if frames:
+                data = b"".join(frames)
+                self._file.write(data)
+                self._file.flush()
+                if self.sync != "never":
+                    os.fsync(self._file.fileno())
+                self._size += len(data)
+            self._flushed = last
+
+    def rotate(self) -> int:
+        """Closes the current segment, continues in the next one and
+           returns the number of the closed segment."""
+        with self._flush_lock:
+            self.flush()
+            self._file.close()
+            closed = self.segment
+            self.segment += 1
+            self._file = open(segment_path(self.path, self.segment), "ab")
+            self._size = 0
+        return closed
+
+    def compact(self) -> threading.Thread:
+        """Starts folding the closed segments into the snapshot in a
+           background thread and returns the thread. Returns the running
+           thread if a compaction is in progress."""
+        with self._flush_lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return self._compaction
+            last = self.rotate()
+            self._compaction = threading.Thread(
+                target=compact, args=(self.database_cls, self.path, last),
+                name="pymemdb-wal-compaction", daemon=True)
+            self._compaction.start()
+        return self._compaction
+
+    def checkpoint(self) -> None:
+        """Folds every change logged so far into the snapshot and waits
+           for it. A compaction that is already running may have rotated
+           before the latest changes, so it is waited for first."""
+        running = self._compaction
+        if running is not None:
+            running.join()
+        self.compact().join()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+        if self._compaction is not None:
+            self._compaction.join()
+
+
+def _load(database_cls, path: str, use_mmap: bool = True,
+          thread_safe: bool = False) -> Tuple[object, int]:
+    """Returns the database of the snapshot 'path' and the number of the
+       last log segment it contains."""
+    if not os.path.exists(path):
+        return database_cls(thread_safe=thread_safe), 0
+    database, extra = snapshot.read(database_cls, path, use_mmap=use_mmap,
+                                    thread_safe=thread_safe)
+    return database, extra.get("wal_segment", 0)
+
+
+def compact(database_cls, path: str, last: int) -> None:
+    """Replays the segments up to 'last' onto a separate copy of the
+       snapshot, saves it and removes the segments."""
+    database, included = _load(database_cls, path, use_mmap=False)
+    for segment in segments(path):
+        if included < segment <= last:
+            replay(database, read_segment(segment_path(path, segment)))
+    snapshot.save(database, path, extra={"wal_segment": last})
+    for segment in segments(path):
+        if segment <= last:
+            os.remove(segment_path(path, segment))
+
+
+def open_database(database_cls, path: str, mmap: bool = True,
+                  thread_safe: bool = False, **options):
+    database, included = _load(database_cls, path, use_mmap=mmap,
+                               thread_safe=thread_safe)
+    existing = segments(path)
+    for segment in existing:
+        log_path = segment_path(path, segment)
+        if segment <= included:
+            # left over from a compaction that did not finish cleaning up
+            os.remove(log_path)
+        else:
+            replay(database, read_segment(log_path))
+    segment = max(existing + [included]) + 1
+    database._attach_wal(WriteAheadLog(database_cls, path, segment, **options))
+    return database
@@ -1,3 +1,5 @@
+import pytest
+
 from pymemdb import Table, ColumnDoesNotExist
 
 
@@ -26,3 +28,70 @@ def test_len_of_column():
 
     assert len(t["a"]) == 3
 
+
+
+def test_unique_columns_are_indexed():
+    t = Table(index=False)
+    t.create_column("a", unique=True, index=False)
+    t.create_column("b")
+
+    assert t["a"].index is True
+    assert t["b"].index is False
+    assert t[t.idx_name].index is True
+
+
+def test_array_column_is_transparent():
+    t = Table(primary_id="pk")
+    t.create_column("n", typecode="q")
+    t.create_column("f", typecode="d", index=False)
+    t.insert_many({"n": i % 4, "f": i / 2} for i in range(20))
+    t.insert({"n": 7})
+
+    assert type(t["n"].cells).__name__ == "ArrayCells"
+    assert len(t["n"]) == 21
+    assert len(t["f"]) == 20
+    assert {r["pk"] for r in t.find(n=3)} == {4, 8, 12, 16, 20}
+    assert [r["f"] for r in t.find(pk=[1, 3, 21])] == [0.0, 1.0, None]
+    assert list(t.find(f=None)) == [{"pk": 21, "n": 7, "f": None}]
+
+    t.update(where={"pk": 2}, f=100.0)
+    t.delete(pk=3)
+    assert t.find_one(pk=2)["f"] == 100.0
+    assert t.find_one(pk=3) is None
+    assert len(t["f"]) == 19
+
+
+def test_array_column_falls_back_to_dict():
+    t = Table(primary_id="pk")
+    t.create_column("a", typecode="q")
+    t.create_column("b", typecode="q")
+    t.insert_many({"a": i, "b": i} for i in range(10))
+
+    t.insert({"a": "text", "b": 1})
+    t.insert({"pk": 10 ** 9, "b": 2})
+
+    assert isinstance(t["a"].cells, dict)
+    assert isinstance(t["b"].cells, dict)
+    assert [r["a"] for r in t.find(pk=[3, 11])] == [2, "text"]
+    assert t.find_one(b=2)["pk"] == 10 ** 9
+
+
+@pytest.mark.parametrize("value", [None, "text", 2 ** 70, True, 1.5])
+def test_array_column_bulk_insert_falls_back_to_dict(value):
+    t = Table()
+    t.create_column("x", typecode="q")
+    t.insert_many([{"x": 1}, {"x": value}])
+
+    assert len(t) == 2
+    assert [r["x"] for r in t.all()] == [1, value]
+    assert type(t.find_one(id=2)["x"]) is type(value)
+
+
+def test_array_column_keeps_types():
+    t = Table()
+    t.create_column("f", typecode="d")
+    t.insert({"f": 1.5})
+    t.insert({"f": 1})
+
+    assert [r["f"] for r in t.all()] == [1.5, 1]
+    assert type(t.find_one(id=2)["f"]) is int
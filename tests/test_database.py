@@ -1,10 +1,14 @@
 
 import os
+import sqlite3
+import subprocess
+import sys
 import pytest
 
 import dataset
 
-from pymemdb import Database, Table, TableAlreadyExists
+from pymemdb import (ColumnDoesNotExist, Database, Table, TableAlreadyExists,
+                     UniqueConstraintError)
 
 
 def test_database_create():
@@ -84,3 +88,177 @@ def test_raise_table_already_exists():
 
     with pytest.raises(TableAlreadyExists):
         db.create_table("table")
+
+
+def test_sqlite_roundtrip(tmpdir):
+    db = Database()
+    db.create_table("a", primary_id="col1")
+    db["a"].create_column("email", unique=True)
+    db["a"].insert_many([{"col1": 1, "email": "a@b.c", "score": 2.5},
+                         {"col1": 5, "email": "d@e.f", "score": 3}])
+    db["b"].insert({"name": "x"})
+
+    path = str(tmpdir / "test.db")
+    db.to_sqlite(path, chunk_size=1, indexes=True)
+    loaded = Database.from_sqlite(path)
+
+    assert loaded.tables == ["a", "b"]
+    assert loaded["a"].idx_name == "col1"
+    assert list(loaded["a"].all()) == list(db["a"].all())
+    assert list(loaded["b"].all()) == list(db["b"].all())
+    assert loaded["a"].insert({"email": "g@h.i"}) == 6
+
+    conn = sqlite3.connect(path)
+    indexes = {name for name, in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(a)")}
+    conn.close()
+    assert {"ux_a_email", "ix_a_score"} <= indexes
+    assert types == {"col1": "INTEGER", "email": "TEXT", "score": "REAL"}
+
+
+def test_sqlite_export_to_connection():
+    t = Table("t")
+    t.insert_many([{"a": i} for i in range(10)])
+    conn = sqlite3.connect(":memory:")
+    synchronous = conn.execute("PRAGMA synchronous").fetchone()
+
+    t.to_sqlite(conn)
+    t.to_sqlite(conn, drop=True)
+
+    assert conn.execute("SELECT count(*) FROM t").fetchone() == (10,)
+    assert conn.execute("PRAGMA synchronous").fetchone() == synchronous
+    assert Table.from_sqlite(conn, "t") == t
+    with pytest.raises(KeyError):
+        Table.from_sqlite(conn, "missing")
+
+
+def test_import_does_not_load_dataset():
+    code = ("import sys, pymemdb; "
+            "print(any(m.split('.')[0] in ('dataset', 'sqlalchemy') "
+            "for m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                         text=True, check=True).stdout
+    assert out.strip() == "False"
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("indexes", [True, False])
+def test_save_load(tmpdir, mmap, indexes):
+    db = Database()
+    t = db.create_table("a", primary_id="pk")
+    t.create_column("n", typecode="q", sorted_index=True)
+    t.create_column("email", unique=True)
+    t.insert_many({"n": i * 2, "email": f"{i}@x", "s": str(i % 3)}
+                  for i in range(100))
+    t.create_column("flag", default=False)
+    t.create_index(["s", "flag"])
+    t.insert({"n": 7, "email": "new@x", "flag": True})
+    db["b"].insert({"name": "x"})
+
+    path = str(tmpdir / "db.snapshot")
+    db.save(path, indexes=indexes)
+    loaded = Database.load(path, mmap=mmap)
+
+    assert loaded.tables == ["a", "b"]
+    la = loaded["a"]
+    assert la.idx_name == "pk"
+    assert list(la.all()) == list(t.all())
+    assert list(loaded["b"].all()) == list(db["b"].all())
+    assert len(list(la.find(flag=False))) == 100
+    assert sorted(r["pk"] for r in la.find(n={"between": (5, 8)})) == [4, 5, 101]
+    assert isinstance(la["n"].cells.data, memoryview) == mmap
+    assert la.indexes == [("s", "flag")]
+    assert la.count(s="1", flag=False) == 33
+    loaded.save(path)
+    assert list(Database.load(path)["a"].all()) == list(t.all())
+    with pytest.raises(UniqueConstraintError):
+        la.insert({"email": "3@x"})
+
+
+    # the first write copies mapped cells into a writable array
+    pk = la.insert({"n": -1})
+    la.update({"pk": 1}, n=1000)
+    assert la.find_one(pk=1)["n"] == 1000
+    assert la.find_one(pk=pk)["n"] == -1
+    assert la.columns == t.columns
+
+
+def test_load_rejects_other_files(tmpdir):
+    path = tmpdir / "garbage"
+    path.write_binary(b"x" * 100)
+    with pytest.raises(ValueError, match="not a pymemdb snapshot"):
+        Database.load(str(path))
+
+
+@pytest.fixture
+def shop():
+    db = Database()
+    db["customers"].insert_many([{"name": "Ann", "city": "Bonn"},
+                                 {"name": "Bob", "city": "Kiel"},
+                                 {"name": "Cid", "city": None}])
+    orders = db.create_table("orders", primary_id="order_id")
+    orders.create_column("customer", index=False)
+    orders.insert_many([{"customer": 1, "item": "pen"},
+                        {"customer": 1, "item": "ink"},
+                        {"customer": 2, "item": "cup"},
+                        {"customer": 9, "item": "hat"}])
+    return db
+
+
+@pytest.mark.parametrize("left, right, on", [
+    ("orders", "customers", ("customer", "id")),
+    ("customers", "orders", ("id", "customer")),
+])
+def test_join_inner(shop, left, right, on):
+    rows = list(shop.join(left, right, on=on, chunk_size=2))
+    pairs = sorted((row["name"], row["item"]) for row in rows)
+    assert pairs == [("Ann", "ink"), ("Ann", "pen"), ("Bob", "cup")]
+
+
+def test_join_left_and_projection(shop):
+    rows = list(shop.join("customers", "orders", on=("id", "customer"),
+                          how="left", columns=["name", "item"]))
+    assert sorted(rows, key=lambda r: (r["name"], r["item"] or "")) == [
+        {"name": "Ann", "item": "ink"}, {"name": "Ann", "item": "pen"},
+        {"name": "Bob", "item": "cup"}, {"name": "Cid", "item": None}]
+
+
+def test_join_same_column_names(shop):
+    shop["cities"].insert_many([{"city": "Bonn", "name": "Bundesstadt"}])
+    rows = list(shop.join("customers", "cities", on="city"))
+    assert rows == [{"id": 1, "name": "Ann", "city": "Bonn",
+                     "cities.id": 1, "cities.name": "Bundesstadt"}]
+
+
+def test_join_errors(shop):
+    with pytest.raises(ValueError, match="Unknown join type"):
+        shop.join("customers", "orders", on="id", how="outer")
+    with pytest.raises(ColumnDoesNotExist):
+        shop.join("customers", "orders", on="nope")
+    with pytest.raises(ColumnDoesNotExist):
+        shop.join("customers", "orders", on="id", columns=["nope"])
+
+
+def test_sqlite_import_without_primary_key():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE x (id INTEGER, v TEXT)")
+    conn.executemany("INSERT INTO x VALUES (?, ?)", [(1, "a"), (1, "b")])
+
+    t = Table.from_sqlite(conn, "x")
+
+    assert t.idx_name == "_id"
+    assert len(t) == 2
+    assert sorted(row["v"] for row in t.find(id=1)) == ["a", "b"]
+
+
+def test_sqlite_export_rejects_string_indexes():
+    t = Table("t")
+    t.insert({"a": 1, "b": 2})
+    conn = sqlite3.connect(":memory:")
+
+    with pytest.raises(TypeError):
+        t.to_sqlite(conn, indexes="ab")
+    t.to_sqlite(conn, indexes=["a"])
+    assert conn.execute("SELECT name FROM sqlite_master "
+                        "WHERE type = 'index'").fetchall() == [("ix_t_a",)]
@@ -17,3 +17,15 @@ def test_simple_db():
 
     assert list(pymem_db["table1"].all()) == list(table1.all())
     assert list(pymem_db["table2"].all()) == list(table2.all())
+
+
+def test_db_threaded(tmpdir):
+    db = dataset.connect(f"sqlite:///{tmpdir / 'test.db'}")
+    for name in ["t1", "t2", "t3"]:
+        db[name].insert_many([dict(a=i, name=name) for i in range(50)])
+
+    pymem_db = pymemdb.Database.from_dataset(db, chunk_size=7, max_workers=3)
+
+    assert pymem_db.tables == ["t1", "t2", "t3"]
+    for name in pymem_db.tables:
+        assert list(pymem_db[name].all(ordered="ascending")) == list(db[name].all())
@@ -62,3 +62,19 @@ def test_invalid_arg_ordered():
 
     with pytest.raises(ValueError):
         list(t.all(ordered="foo"))
+
+
+def test_insert_many_unique_constraint():
+    t = Table(primary_id="pk")
+    t.create_column("a", unique=True)
+    t.insert({"a": 1})
+
+    with pytest.raises(UniqueConstraintError):
+        t.insert_many([{"a": 2}, {"a": 1}])
+    with pytest.raises(UniqueConstraintError):
+        t.insert_many([{"a": 3}, {"a": 3}])
+    with pytest.raises(UniqueConstraintError):
+        t.insert_many([{"pk": 1, "a": 4}])
+
+    assert len(t) == 1
+    assert t.columns == ["pk", "a"]
@@ -1,4 +1,4 @@
-from pymemdb import Table
+from pymemdb import Table, ColumnDoesNotExist
 
 import pytest
 
@@ -74,4 +74,198 @@ def test_find_one_no_result():
 
     row = t.find_one(a=2)
 
-    assert row == None
\ No newline at end of file
+    assert row == None
+
+def test_find_unindexed_columns():
+    t = Table(primary_id="pk", index=False)
+    t.create_column("indexed", index=True)
+    t.insert_many({"indexed": i % 2, "free": f"text{i % 3}"} for i in range(12))
+
+    assert t["free"].values == {}
+    assert {r["pk"] for r in t.find(free="text1")} == {2, 5, 8, 11}
+    assert {r["pk"] for r in t.find(free=["text0", "text1"], indexed=0)} == {1, 5, 7, 11}
+    assert {r["pk"] for r in t.find(indexed=1, free="text2")} == {6, 12}
+    assert list(t.find(free="nothing", indexed=1)) == []
+
+
+def test_find_unindexed_default():
+    t = Table(primary_id="pk")
+    t.create_column("a", default="x", index=False)
+    t.insert({"b": 1})
+    t.insert({"a": "y", "b": 1})
+
+    assert [r["pk"] for r in t.find(a="x")] == [1]
+    assert [r["pk"] for r in t.find(b=1, a=["x"])] == [1]
+
+
+@pytest.mark.parametrize("sorted_index", [True, False])
+def test_find_range(sorted_index):
+    t = Table(primary_id="pk")
+    t.create_column("price", sorted_index=sorted_index)
+    t.insert_many({"price": p} for p in [5, 10, 20, 50, 50, 70, None])
+    t.insert({"other": 1})
+
+    def pks(**kwargs):
+        return sorted(r["pk"] for r in t.find(**kwargs))
+
+    assert pks(price={"gt": 10, "lte": 50}) == [3, 4, 5]
+    assert pks(price={"gte": 10, "lt": 50}) == [2, 3]
+    assert pks(price={"between": (20, 70)}) == [3, 4, 5, 6]
+    assert pks(price={"lt": 0}) == []
+    assert pks(price={"gt": 10, "in": [5, 50]}) == [4, 5]
+    assert pks(price={"eq": None}) == [7, 8]
+    assert pks(price={"gt": 10}, other=None) == [3, 4, 5, 6]
+
+
+def test_sorted_index_stays_in_sync():
+    t = Table(primary_id="pk")
+    t.create_column("a", sorted_index=True)
+    t.insert_many([{"a": 3}, {"a": 1}, {"a": 2}])
+    t.insert({"a": 0})
+    t.update(where={"pk": 2}, a=7)
+    t.delete(pk=1)
+
+    assert t["a"].sorted_values == [0, 2, 7]
+    assert [r["pk"] for r in t.find(a={"gt": 1})] == [2, 3]
+    assert [r["pk"] for r in t.find(a={"lt": 3})] == [3, 4]
+    assert list(t.find(a=1)) == []
+
+    t.create_sorted_index("pk")
+    assert [r["a"] for r in t.find(pk={"lte": 3})] == [7, 2]
+
+
+def test_incomparable_values_write_nothing():
+    t = Table(primary_id="pk")
+    t.create_column("a", sorted_index=True)
+    t.insert({"a": 1})
+
+    with pytest.raises(TypeError):
+        t.insert_many([{"a": 2, "b": 1}, {"a": "x", "b": 2}])
+    with pytest.raises(TypeError):
+        t.insert({"a": "x", "b": 3})
+    with pytest.raises(TypeError):
+        t.update(where={"pk": 1}, a="x", b=4)
+    assert list(t.all()) == [{"pk": 1, "a": 1}]
+    assert t["a"].sorted_values == [1]
+
+
+def test_find_range_unindexed_filter():
+    t = Table(primary_id="pk")
+    t.create_column("a", index=False)
+    t.insert_many({"a": i, "b": i % 2} for i in range(10))
+
+    assert sorted(r["a"] for r in t.find(b=0, a={"gte": 6})) == [6, 8]
+    assert [r["a"] for r in t.find(a={"gte": 8})] == [8, 9]
+
+
+def test_find_unknown_operator():
+    t = Table()
+    t.insert({"a": 1})
+
+    with pytest.raises(ValueError):
+        list(t.find(a={"like": 1}))
+
+
+def test_find_projection():
+    t = Table(primary_id="pk")
+    t.insert_many({"a": i, "b": i * 2, "c": "x"} for i in range(5))
+
+    assert list(t.find(a=[1, 2], columns=["b"])) == [{"b": 2}, {"b": 4}]
+    assert t.find_one(a=3, columns=["c", "pk"]) == {"c": "x", "pk": 4}
+    assert list(t.all(columns=["a"], order_by="-a", limit=2)) == [{"a": 4}, {"a": 3}]
+
+    with pytest.raises(ColumnDoesNotExist):
+        list(t.all(columns=["d"]))
+
+
+def test_row_types():
+    t = Table(primary_id="pk")
+    t.insert_many({"a": i, "b": i * 2} for i in range(3))
+
+    assert list(t.all(row_type=tuple)) == [(1, 0, 0), (2, 1, 2), (3, 2, 4)]
+    records = list(t.find(a=1, row_type="record"))
+    assert records[0].pk == 2
+    assert records[0].b == 2
+    assert type(records[0]) is type(next(t.all(row_type="record")))
+    assert t.all(columns=["b", "a"], row_type="columns") == {"b": [0, 2, 4], "a": [0, 1, 2]}
+    assert t.find(a={"gt": 5}, row_type="columns") == {"pk": [], "a": [], "b": []}
+
+    with pytest.raises(ValueError):
+        t.all(row_type=list)
+
+
+def test_columns_row_type_from_arrays():
+    t = Table(primary_id="pk")
+    t.create_column("f", typecode="d", index=False)
+    t.insert_many({"f": i / 2} for i in range(6))
+
+    result = t.all(ordered="ascending", row_type="columns")
+    assert type(result["f"]).__name__ == "array"
+    assert list(result["f"]) == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]
+    assert result["pk"] == [1, 2, 3, 4, 5, 6]
+    assert list(t.find(pk=[2, 4], row_type="columns")["f"]) == [0.5, 1.5]
+
+
+def test_default_rows_are_tracked():
+    t = Table(primary_id="pk")
+    t.insert_many([{"a": 1}, {"a": 2}, {"b": 3}])
+    t.insert({"a": 4})
+    t.create_column("c", default=0)
+    t.insert({"c": 5})
+
+    assert t["a"].missing == {3, 5}
+    assert t["b"].missing == {1, 2, 4, 5}
+    assert t["c"].missing == {1, 2, 3, 4}
+    assert [r["pk"] for r in t.find(a=None)] == [3, 5]
+    assert [r["pk"] for r in t.find(c=0, b=None)] == [1, 2, 4]
+
+    t.update(where={"pk": 3}, a=9, d="new")
+    t.delete(pk=[1, 5])
+    assert [r["pk"] for r in t.find(a=None)] == []
+    assert t["c"].missing == {2, 3, 4}
+    assert [r["pk"] for r in t.find(d=None)] == [2, 4]
+
+    # the cached rows without a cell follow later inserts and deletes
+    t.insert({"pk": 6, "b": 1})
+    assert t["c"].missing == {2, 3, 4, 6}
+    t.delete(pk=2)
+    t.insert({"pk": 7, "b": 1})
+    assert t["c"].missing == {3, 4, 6, 7}
+    assert t.stats("c")["missing"] == 4
+
+
+def test_explain_orders_by_selectivity():
+    t = Table(primary_id="pk")
+    t.create_column("text", index=False)
+    t.create_column("n", sorted_index=True)
+    t.insert_many({"kind": i % 2, "n": i, "text": str(i % 5)} for i in range(100))
+
+    plan = t.explain(kind=1, text="3", n={"lt": 10}, pk=[5, 6, 7])
+    assert [(s["column"], s["method"]) for s in plan] == [
+        ("pk", "index"), ("n", "probe"), ("kind", "intersect"), ("text", "probe")]
+    assert [s["estimate"] for s in plan] == [3, 10, 50, 100]
+    assert [r["pk"] for r in t.find(kind=1, text="3", n={"lt": 10}, pk=[5, 6, 7])] == []
+    assert [r["pk"] for r in t.find(kind=0, text="3", n={"lt": 10})] == [9]
+    assert t.explain(kind=5)[0]["estimate"] == 0
+
+    # unindexed columns with value counts are estimated exactly
+    t.create_column("counted", index=False, counts=True)
+    t.update({"kind": 1}, counted="x")
+    assert [(s["column"], s["estimate"], s["method"])
+            for s in t.explain(counted="x", text="3")] == [
+        ("counted", 50, "scan"), ("text", 100, "probe")]
+    assert list(t.find(kind=5, text="3")) == []
+
+
+def test_find_with_iterators():
+    t = Table(primary_id="pk")
+    t.create_column("b", index=False)
+    t.insert_many({"a": i, "b": i % 2} for i in range(5))
+
+    assert [r["a"] for r in t.find(a=(x for x in [1, 2]))] == [1, 2]
+    assert [r["a"] for r in t.find(b=iter([1]), a=map(int, "123"))] == [1, 3]
+    assert [r["a"] for r in t.find(a={"in": (x for x in [0, 4])})] == [0, 4]
+    assert t.count(a=iter([1, 2]), b=iter([0])) == 1
+    assert t.update({"a": iter([3, 4])}, c=1) == 2
+    assert t.delete(a=(x for x in [0])) == 1
+    assert len(t) == 4
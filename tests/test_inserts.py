@@ -22,3 +22,54 @@ def test_no_insert_columns_on_find():
 
     assert list(t.find(a=1, b=2, ignore_errors=True)) == [{"a": 1}]
     assert t.columns == ["a"]
+
+
+def test_insert_many_matches_insert():
+    rows = [{"a": i, "b": i % 3} for i in range(25)]
+    t1 = Table(primary_id="pk")
+    for row in rows:
+        t1.insert(row)
+    t2 = Table(primary_id="pk")
+
+    assert t2.insert_many(iter(rows), chunk_size=7) == 25
+    assert list(t2.all(ordered="ascending")) == list(t1.all(ordered="ascending"))
+    assert {r["pk"] for r in t2.find(b=1)} == {r["pk"] for r in t1.find(b=1)}
+
+
+def test_insert_many_indexes_on_first_use():
+    t = Table(primary_id="pk")
+    t.insert_many(({"a": i % 3} for i in range(10)), chunk_size=4)
+    assert t["a"]._pending and t["pk"]._pending
+
+    t.insert_many([{"pk": 20, "a": 1}])
+    t.update(where={"pk": 2}, a=7)
+    t.delete(pk=[1, 4])
+    assert not t["a"]._pending
+    assert {val: sorted(pks) for val, pks in t["a"].values.items()} == {
+        0: [7, 10], 1: [5, 8, 20], 2: [3, 6, 9], 7: [2]}
+    assert t.count(pk=20) == 1
+    assert not t["pk"]._pending
+
+
+def test_insert_many_mixed_columns_and_ids():
+    t = Table(primary_id="pk")
+    t.insert({"pk": 2, "a": 1})
+    t.insert_many([{"a": 2}, {"pk": 3, "b": 5}, {"a": 3}])
+
+    assert list(t.all(ordered="ascending")) == [
+        {"pk": 2, "a": 1, "b": None},
+        {"pk": 3, "a": None, "b": 5},
+        {"pk": 4, "a": 2, "b": None},
+        {"pk": 5, "a": 3, "b": None},
+    ]
+
+
+def test_auto_pk_after_explicit_ids():
+    t = Table(primary_id="pk")
+    t.insert({"pk": 10})
+    assert t.insert({}) == 11
+    t.insert({"pk": 5})
+    t.insert({"pk": "text"})
+    assert t.insert({}) == 12
+    t.delete(pk=12)
+    assert t.insert({}) == 13
@@ -1,4 +1,9 @@
+import threading
+
+import pytest
+
 from pymemdb import Table, UniqueConstraintError, ColumnDoesNotExist
+from pymemdb.locks import RWLock
 
 
 def test_number_of_rows():
@@ -102,3 +107,286 @@ def test_equal_tables():
 
     assert t1 == t3
     assert t1 != t2
+
+
+@pytest.mark.parametrize("sorted_index", [True, False])
+def test_order_by(sorted_index):
+    t = Table(primary_id="pk")
+    t.create_column("score", default=3, sorted_index=sorted_index)
+    t.insert_many([{"score": 5}, {"score": 1}, {"score": None}, {"x": 1},
+                   {"score": 4}, {"score": 1}])
+
+    def pks(rows):
+        return [r["pk"] for r in rows]
+
+    assert pks(t.all(order_by="score")) == [2, 6, 4, 5, 1, 3]
+    assert pks(t.all(order_by="-score")) == [3, 1, 5, 4, 2, 6]
+    assert pks(t.all(order_by="score", limit=2, offset=1)) == [6, 4]
+    assert pks(t.all(order_by="-score", limit=2)) == [3, 1]
+    assert pks(t.find(score={"lt": 5}, order_by="-score", limit=2)) == [5, 4]
+    assert pks(t.find(x=None, order_by="score", offset=3)) == [1, 3]
+    assert t.find_one(score={"gt": 1}, order_by="score") == {"pk": 4, "score": 3, "x": 1}
+
+
+def test_limit_without_order():
+    t = Table()
+    t.insert_many({"a": i} for i in range(10))
+
+    assert len(list(t.all(limit=3))) == 3
+    assert len(list(t.find(a=[1, 2, 3], limit=5, offset=1))) == 2
+
+
+def test_order_by_invalid_column():
+    t = Table()
+    t.insert({"a": 1})
+
+    with pytest.raises(KeyError):
+        list(t.all(order_by="-b"))
+
+
+def test_delete_by_pk():
+    t = Table(primary_id="pk")
+    t.create_column("a", sorted_index=True)
+    t.create_column("f", typecode="d", index=False)
+    t.insert_many({"a": i % 100, "f": i / 2} for i in range(300))
+    t.insert({"b": 1})
+
+    assert t.delete_by_pk(range(1, 201)) == 200
+    assert t.delete_by_pk([1, 301, 1000]) == 1
+    assert len(t) == 100
+    assert t["a"].sorted_values == list(range(100))
+    assert len(t["f"]) == 100
+    assert t["a"].missing == set()
+
+    assert t.delete(a={"lt": 80}) == 80
+    assert t["a"].sorted_values == list(range(80, 100))
+    assert sorted(t["a"].values) == list(range(80, 100))
+    assert t.delete(a=[80, 81, 82]) == 3
+    assert t["a"].sorted_values == list(range(83, 100))
+    assert [r["pk"] for r in t.find(a=99)] == [300]
+
+
+def test_thread_safe_readers_and_writers():
+    t = Table(thread_safe=True)
+    t.insert_many({"a": i % 10, "b": i} for i in range(1000))
+    errors = []
+
+    def read():
+        try:
+            for _ in range(10):
+                rows = list(t.all())
+                assert len({row["id"] for row in rows}) == len(rows)
+                list(t.find(a=3))
+                sum(len(chunk) for chunk in t.iter_chunks(100))
+        except Exception as e:  # pragma: no cover
+            errors.append(e)
+
+    def write():
+        for i in range(200):
+            t.insert({"a": i % 10, "b": i})
+            if i % 20 == 0:
+                t.delete(b=i)
+                t.update({"a": 5}, b=-1)
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    threads += [threading.Thread(target=write) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(t) == len(list(t.all()))
+
+
+def test_rwlock():
+    lock = RWLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    with lock.read():
+        with lock.read():
+            with pytest.raises(RuntimeError):
+                lock.acquire_write()
+
+    events = []
+    lock.acquire_read()
+    writer = threading.Thread(target=lambda: (lock.acquire_write(),
+                                              events.append("write"),
+                                              lock.release_write()))
+    writer.start()
+    writer.join(0.05)
+    assert events == []
+    lock.release_read()
+    writer.join()
+    assert events == ["write"]
+
+
+@pytest.fixture
+def sales():
+    t = Table()
+    t.create_column("amount", typecode="d", index=False)
+    t.insert_many([{"region": "north", "shop": 1, "amount": 10.0},
+                   {"region": "north", "shop": 2, "amount": 30.0},
+                   {"region": "south", "shop": 3, "amount": 5.0},
+                   {"region": "south", "shop": 3, "amount": 7.0},
+                   {"shop": 4, "amount": 1.0}])
+    t.create_column("rebate", index=False)
+    t.update({"shop": 3}, rebate=2)
+    return t
+
+
+def test_aggregate_count_from_index(sales):
+    result = sales.aggregate(group_by="region", count=True)
+    assert sorted(result, key=lambda r: r["count"]) == [
+        {"region": None, "count": 1}, {"region": "north", "count": 2},
+        {"region": "south", "count": 2}]
+
+
+def test_aggregate_functions(sales):
+    result = sales.aggregate(group_by=["region"], count=True, sum="amount",
+                             min=["amount", "rebate"], max="amount",
+                             mean=["amount", "rebate"])
+    by_region = {row.pop("region"): row for row in result}
+    assert by_region["north"] == {"count": 2, "sum_amount": 40.0,
+                                  "min_amount": 10.0, "min_rebate": None,
+                                  "max_amount": 30.0, "mean_amount": 20.0,
+                                  "mean_rebate": None}
+    assert by_region["south"]["mean_rebate"] == 2
+    assert sales.aggregate(sum="amount", count=True) == [
+        {"count": 5, "sum_amount": 53.0}]
+
+
+def test_aggregate_where_and_multiple_keys(sales):
+    result = sales.aggregate(group_by=["region", "shop"], count=True,
+                             where={"amount": {"gt": 6}})
+    assert sorted(result, key=lambda r: r["shop"]) == [
+        {"region": "north", "shop": 1, "count": 1},
+        {"region": "north", "shop": 2, "count": 1},
+        {"region": "south", "shop": 3, "count": 1}]
+    with pytest.raises(ColumnDoesNotExist):
+        sales.aggregate(group_by="nope", count=True)
+
+
+def test_value_counts_and_distinct(sales):
+    assert sales.value_counts("shop") == {3: 2, 1: 1, 2: 1, 4: 1}
+    assert sales.value_counts("rebate") == {None: 3, 2: 2}
+    assert sales.value_counts("region", where={"shop": 3}) == {"south": 2}
+    assert sorted(sales.distinct("amount")) == [1.0, 5.0, 7.0, 10.0, 30.0]
+    assert sales.distinct("region", where={"shop": 4}) == [None]
+
+
+def test_count(sales):
+    assert sales.count() == 5
+    assert sales.count(region="south") == 2
+    assert sales.count(rebate=None) == 3
+    assert sales.count(shop=[1, 3, 9]) == 3
+    assert sales.count(amount=7.0) == 1
+    assert sales.count(region="south", amount={"gt": 6}) == 1
+    assert sales.count(nope=1) == 0
+    with pytest.raises(KeyError):
+        sales.count(ignore_errors=False, nope=1)
+
+
+def test_stats_are_maintained(sales):
+    assert sales.stats("rebate") == {"rows": 5, "distinct": 2, "nulls": 3,
+                                     "missing": 3, "min": 2, "max": 2}
+    assert sales.stats("amount")["min"] == 1.0
+
+    sales.delete(shop=4)
+    sales.update({"shop": 1}, rebate=0)
+    sales.insert({"region": "west", "amount": 50.0, "rebate": "text"})
+    stats = sales.stats("amount")
+    assert (stats["rows"], stats["distinct"], stats["min"], stats["max"]) == (
+        5, 5, 5.0, 50.0)
+    assert sales.stats("region")["distinct"] == 3
+    # strings and numbers can not be ordered
+    assert sales.stats("rebate") == {"rows": 5, "distinct": 4, "nulls": 1,
+                                     "missing": 1, "min": None, "max": None}
+    assert sales["rebate"].histogram() == {None: 1, 0: 1, 2: 2, "text": 1}
+
+
+def test_composite_index_find():
+    t = Table()
+    t.create_column("c", default=0)
+    t.insert_many({"a": i % 10, "b": i % 7, "c": i % 3} for i in range(200))
+    t.create_index(["a", "b"])
+    t.create_index("c")
+
+    plan = t.explain(a=3, b=5, c=1)
+    assert [step["column"] for step in plan] == [("a", "b"), "c"]
+    assert plan[0]["method"] == "index"
+    assert plan[1]["method"] == "intersect"
+    expected = [r["id"] for r in t.all() if (r["a"], r["b"]) == (3, 5)]
+    assert sorted(r["id"] for r in t.find(a=3, b=5)) == expected
+    assert t.count(a=3, b=5, c=1) == sum(
+        1 for r in t.all() if (r["a"], r["b"], r["c"]) == (3, 5, 1))
+    # lists and ranges are not looked up in the composite index
+    assert t.explain(a=[1, 3], b=5)[0]["column"] in ("a", "b")
+
+    t.update({"a": 3}, b=0)
+    t.delete(a=4)
+    t.insert({"a": 3})
+    assert t.count(a=3, b=5) == 0
+    assert t.count(a=3, b=None) == 1
+    assert t.count(a=4, b=0) == 0
+    assert t.count(c=0) == len(list(t.find(c=0)))
+
+    del t["b"]
+    assert t.indexes == [("c",)]
+    t.drop_index("c")
+    with pytest.raises(KeyError):
+        t.drop_index("c")
+
+
+def test_composite_unique_constraint():
+    t = Table()
+    t.insert_many([{"a": 1, "b": 1}, {"a": 1, "b": 2}])
+    t.create_index(["a", "b"], unique=True)
+    with pytest.raises(ValueError):
+        t.create_index(["a", "b"])
+    with pytest.raises(ColumnDoesNotExist):
+        t.create_index(["a", "nope"])
+
+    with pytest.raises(UniqueConstraintError):
+        t.insert({"a": 1, "b": 2})
+    with pytest.raises(UniqueConstraintError):
+        t.insert_many([{"a": 2, "b": 1}, {"a": 2, "b": 1}])
+    with pytest.raises(UniqueConstraintError):
+        t.update({"b": 2}, b=1)
+    assert len(t) == 2
+
+    # swapping values between rows is fine
+    t.update_many([(1, {"b": 2}), (2, {"b": 1})])
+    assert t.find_one(a=1, b=2)["id"] == 1
+    assert t.insert_ignore({"a": 1, "b": 1, "c": 0}, keys=["a", "b"]) is None
+    assert t.insert_ignore({"a": 1, "b": 3}, keys=["a", "b"]) is not None
+    assert len(t) == 3
+
+    t.insert({"a": 1})
+    with pytest.raises(UniqueConstraintError):
+        t.insert({"a": 1, "c": 5})
+    t2 = Table()
+    t2.insert_many([{"a": 1}, {"a": 1}])
+    with pytest.raises(UniqueConstraintError):
+        t2.create_index("a", unique=True)
+    assert t2.indexes == []
+
+
+def test_value_counts_are_opt_in():
+    t = Table()
+    t.create_column("counted", index=False, counts=True)
+    t.create_column("scanned", index=False)
+    t.insert_many({"counted": i % 4, "scanned": i % 4} for i in range(20))
+    t.insert({"counted": 9, "scanned": 9})
+    t.update({"id": [1, 2]}, counted=-1, scanned=-1)
+    t.delete(id=[3, 21])
+    t.insert({"other": 1})
+
+    assert t["scanned"].counts is None
+    assert t["counted"].histogram() == t["scanned"].histogram()
+    assert t.stats("counted") == t.stats("scanned")
+    assert t.stats("counted")["min"] == -1
+    assert t.explain(counted=0)[0]["estimate"] == 4
+    assert t.count(counted=0) == t.count(scanned=0) == 4
@@ -67,3 +67,39 @@ def test_to_dataset_no_drop(simple_dataset_db):
     t.to_dataset(simple_dataset_db, drop=False)
 
     assert list(simple_dataset_db["my_table2"].all()) == list(t.all())
+
+
+def test_to_dataset_chunked_progress(simple_dataset_db):
+    t = pymemdb.Table("chunked", primary_id="id")
+    t.insert_many({"b": i, "c": str(i)} for i in range(25))
+    calls = []
+
+    t.to_dataset(simple_dataset_db, chunk_size=10,
+                 progress=lambda *args: calls.append(args))
+
+    assert calls == [("chunked", 10, 25), ("chunked", 20, 25), ("chunked", 25, 25)]
+    assert list(simple_dataset_db["chunked"].all()) == list(t.all(ordered="ascending"))
+
+
+def test_iter_chunks():
+    t = pymemdb.Table(primary_id="pk")
+    t.insert_many({"a": i} for i in range(5))
+
+    chunks = list(t.iter_chunks(chunk_size=2, columns=["a"]))
+    assert chunks == [[{"a": 0}, {"a": 1}], [{"a": 2}, {"a": 3}], [{"a": 4}]]
+
+
+def test_from_dataset_columns_and_where(simple_dataset_db):
+    simple_table = simple_dataset_db["my_table"]
+    simple_table.update(dict(a=3, b=2), ["a"])
+
+    pytable = pymemdb.Table.from_dataset(simple_table, chunk_size=3,
+                                         columns=["b"], where={"a": {"gte": 3}})
+
+    assert pytable.columns == ["id", "b"]
+    assert len(pytable) == 7
+    assert list(pytable.find(b=2)) == [{"id": 4, "b": 2}]
+    assert pytable.insert({"b": 5}) == 11
+
+    with pytest.raises(pymemdb.ColumnDoesNotExist):
+        pymemdb.Table.from_dataset(simple_table, columns=["nope"])
@@ -1,4 +1,6 @@
-from pymemdb import Table
+import pytest
+
+from pymemdb import Table, UniqueConstraintError
 
 
 def test_update_single():
@@ -107,3 +109,165 @@ def test_update_replace_multiple_replace():
 
     assert len(t) == 3
     assert len(list(t.find(nachname="greiff"))) == 2
+
+
+def test_update_keeps_index_consistent():
+    t = Table(primary_id="pk")
+    t.insert_many({"status": "new"} for _ in range(3))
+    t.update(dict(pk=[1, 2]), status="done")
+    t.update(dict(status="done"), status="archived")
+
+    assert set(t["status"].values) == {"new", "archived"}
+    assert list(t.find(status="done")) == []
+    assert [r["pk"] for r in t.find(status="archived")] == [1, 2]
+
+
+def test_update_callable():
+    t = Table(primary_id="pk")
+    t.insert_many([{"score": 1}, {"score": 5}, {}])
+    t.update(dict(pk=[1, 2]), score=lambda old: old + 1, new=lambda old: old)
+
+    assert list(t.all(columns=["score", "new"])) == [
+        {"score": 2, "new": None}, {"score": 6, "new": None}, {"score": None, "new": None}]
+    assert [r["pk"] for r in t.find(score=6)] == [2]
+
+
+def test_update_many():
+    t = Table(primary_id="pk")
+    t.insert_many({"a": i} for i in range(3))
+    n = t.update_many([(1, {"a": 10, "b": "x"}), (3, {"a": lambda old: old * 7}),
+                       (1, {"a": lambda old: old + 1}), (99, {"a": 0})])
+
+    assert n == 2
+    assert list(t.all(columns=["a", "b"])) == [
+        {"a": 11, "b": "x"}, {"a": 1, "b": None}, {"a": 14, "b": None}]
+    assert [r["pk"] for r in t.find(b=None)] == [2, 3]
+
+
+def test_update_unique_constraint():
+    t = Table(primary_id="pk")
+    t.create_column("u", unique=True)
+    t.insert_many({"u": i} for i in range(3))
+
+    t.update_many([(1, {"u": 1}), (2, {"u": 0})])
+    assert list(t.all(columns=["u"])) == [{"u": 1}, {"u": 0}, {"u": 2}]
+
+    with pytest.raises(UniqueConstraintError):
+        t.update(dict(pk=1), u=2)
+    with pytest.raises(UniqueConstraintError):
+        t.update(dict(pk=[1, 2]), u=7)
+    with pytest.raises(ValueError):
+        t.update(dict(pk=1), pk=5)
+    assert list(t.all(columns=["u"])) == [{"u": 1}, {"u": 0}, {"u": 2}]
+
+
+def test_deduplicate():
+    t = Table(primary_id="pk")
+    t.insert_many([
+        dict(a=1, b="x"), dict(a=1, b="x"), dict(a=1, b="y"),
+        dict(a=2, b="x"), dict(a=1, b="x"), dict(a=2),
+    ])
+
+    assert t.deduplicate(subset=["a"], keep="max", where={"b": "x"}) == 2
+    assert sorted(t.keys) == [3, 4, 5, 6]
+    assert t.deduplicate(subset=["b"]) == 1
+    assert sorted(t.keys) == [3, 4, 6]
+    assert t.deduplicate() == 0
+
+    with pytest.raises(ValueError):
+        t.deduplicate(keep="first")
+
+
+def test_update_replace_callable():
+    t = Table(primary_id="pk")
+    t.insert_many([dict(a=1, b="x"), dict(a=2, b="x"), dict(a=3, b="y")])
+
+    assert t.update_replace(where={"b": "x"}, a=lambda old: 5) == 1
+    assert list(t.all(columns=["a", "b"])) == [{"a": 5, "b": "x"}, {"a": 3, "b": "y"}]
+
+
+@pytest.mark.parametrize("where, kwargs, expected", [
+    ({"b": 1}, {"b": lambda old: old + 1}, {"a": 1, "b": 2}),
+    ({"a": 1}, {"a": lambda old: 5}, {"a": 5, "b": 1}),
+])
+def test_update_replace_callable_on_where_column(where, kwargs, expected):
+    t = Table(primary_id="pk")
+    t.insert_many([dict(a=1, b=1), dict(a=1, b=1)])
+
+    assert t.update_replace(where, **kwargs) == 1
+    assert list(t.all(columns=["a", "b"])) == [expected]
+
+
+def test_upsert():
+    t = Table()
+    assert t.upsert({"name": "a", "n": 1}, keys=["name"]) == 1
+    assert t.upsert({"name": "b", "n": 2}, keys=["name"]) == 2
+    assert t.upsert({"name": "a", "n": 3, "new": True}, keys=["name"]) == 1
+    assert list(t.all()) == [{"id": 1, "name": "a", "n": 3, "new": True},
+                             {"id": 2, "name": "b", "n": 2, "new": None}]
+    # key columns that do not exist yet are None for all rows
+    assert t.upsert({"group": None, "n": 0}, keys=["group"]) == 1
+    assert t.count(n=0) == 2
+    with pytest.raises(ValueError):
+        t.upsert({"id": 7, "name": "b"}, keys=["name"])
+
+
+@pytest.mark.parametrize("index", ["composite", "column", "none"])
+def test_upsert_many_matches_upsert(index):
+    def rows():
+        for i in range(300):
+            row = {"a": i % 7, "b": i % 11 if i % 5 else None, "n": i}
+            if i % 3 == 0:
+                row["extra"] = i
+            yield row
+
+    tables = []
+    for _ in range(2):
+        t = Table()
+        t.create_column("b", index=index == "column")
+        t.insert_many({"a": i, "b": i, "n": -1} for i in range(5))
+        if index == "composite":
+            t.create_index(["b", "a"])
+        tables.append(t)
+    one_by_one, bulk = tables
+    keys = ["b"] if index == "column" else ["a", "b"]
+    for row in rows():
+        one_by_one.upsert(row, keys=keys)
+
+    n_inserted = bulk.upsert_many(rows(), keys=keys, chunk_size=64)
+    assert n_inserted == len(bulk) - 5
+    assert list(bulk.all()) == list(one_by_one.all())
+
+
+def test_upsert_many_unique_constraint():
+    t = Table()
+    t.create_column("email", unique=True)
+    t.upsert_many([{"user": 1, "email": "a"}, {"user": 2, "email": "b"}],
+                  keys=["user"])
+    with pytest.raises(UniqueConstraintError):
+        t.upsert_many([{"user": 3, "email": "c"}, {"user": 4, "email": "c"}],
+                      keys=["user"])
+    assert len(t) == 2
+    t.upsert_many([{"user": 1, "email": "c"}, {"user": 3, "email": "a"}],
+                  keys=["user"])
+    assert {r["user"]: r["email"] for r in t.all()} == {1: "c", 2: "b", 3: "a"}
+
+
+@pytest.mark.parametrize("index", [True, False])
+def test_upsert_with_primary_key_and_tuple_values(index):
+    t = Table()
+    t.create_column("a", index=index)
+    t.insert_many([{"a": 1, "b": 1}, {"a": (1, 2), "b": 2}])
+
+    assert t.upsert({"id": 1, "a": 1, "b": 5}, keys=["a"]) == 1
+    assert t.upsert({"a": (1, 2), "b": 6}, keys=["a"]) == 2
+    assert t.upsert_many(list(t.all()), keys=["a"]) == 0
+    assert list(t.all()) == [{"id": 1, "a": 1, "b": 5},
+                             {"id": 2, "a": (1, 2), "b": 6}]
+    with pytest.raises(ValueError):
+        t.upsert({"id": 2, "a": 1}, keys=["a"])
+    with pytest.raises(ValueError):
+        t.upsert_many([{"id": 2, "a": 1}], keys=["a"])
+    with pytest.raises(ValueError):
+        t.upsert_many([{"id": 7, "a": 3}, {"id": 8, "a": 3}], keys=["a"])
+    assert len(t) == 2
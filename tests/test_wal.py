@@ -0,0 +1,179 @@
+import os
+import threading
+
+import pytest
+
+from pymemdb import Database, Table
+from pymemdb import wal
+
+
+def rows(db):
+    return {name: list(db[name].all(ordered="ascending")) for name in db.tables}
+
+
+def change_everything(db):
+    db["a"].insert({"x": 1, "y": "one"})
+    db["a"].insert_many({"x": i, "y": str(i)} for i in range(2, 20))
+    db["a"].create_column("n", typecode="q", default=0)
+    db["a"].create_index(["x", "n"], unique=True)
+    db["a"].create_sorted_index("x")
+    db["a"].update({"x": {"lt": 5}}, n=lambda n: n + 5, y="small")
+    db["a"].delete(x={"gte": 15})
+    db["a"].insert({"id": 100, "x": 100})
+    del db["a"]["y"]
+    other = Table("b")
+    other.insert_many({"z": i} for i in range(3))
+    db["b"] = other
+    db["b"].update_replace({"z": 2}, z=1)
+    db.create_table("c", primary_id="pk")
+    db.drop_table("c")
+
+
+def test_replay_after_crash(tmpdir):
+    path = str(tmpdir / "db.snapshot")
+    db = Database.open(path, sync="always")
+    change_everything(db)
+    # no close, the process "crashes" here
+    reopened = Database.open(path)
+
+    assert reopened.tables == ["a", "b"]
+    assert rows(reopened) == rows(db)
+    assert {r["id"] for r in reopened["a"].find(n={"gte": 5})} == {1, 2, 3, 4}
+    assert reopened["a"].explain(x=3, n=5)[0]["column"] == ("x", "n")
+    assert reopened["a"]["x"].sorted_values == [1, 2, 3, 4, 5, 6, 7, 8, 9,
+                                                10, 11, 12, 13, 14, 100]
+    assert reopened["a"].count(x=3, n=5) == 1
+    assert reopened["a"].insert({"x": 0}) == 101
+
+
+def test_batch_sync_commit(tmpdir):
+    path = str(tmpdir / "db.snapshot")
+    db = Database.open(path, batch_size=100)
+    db["a"].insert({"x": 1})
+    assert Database.open(path).tables == []
+
+    db.commit()
+    assert rows(Database.open(path)) == {"a": [{"id": 1, "x": 1}]}
+
+
+def test_compaction(tmpdir):
+    path = str(tmpdir / "db.snapshot")
+    db = Database.open(path)
+    change_everything(db)
+    db.compact().join()
+    db["a"].insert({"x": 200})
+    db.close()
+
+    assert os.path.exists(path)
+    assert wal.segments(path) == [2]
+    reopened = Database.open(path)
+    assert rows(reopened) == rows(db)
+    reopened.compact().join()
+    reopened.close()
+    assert rows(Database.open(path, mmap=False)) == rows(db)
+
+
+def test_compact_size(tmpdir):
+    path = str(tmpdir / "db.snapshot")
+    db = Database.open(path, batch_size=1, compact_size=1000)
+    for i in range(50):
+        db["a"].insert({"x": i, "text": "a" * 50})
+    db.close()
+
+    assert len(wal.segments(path)) < 10
+    assert rows(Database.open(path)) == rows(db)
+
+
+def test_torn_record_is_cut_off(tmpdir):
+    path = str(tmpdir / "db.snapshot")
+    db = Database.open(path)
+    db["a"].insert({"x": 1})
+    db.close()
+    log_path = wal.segment_path(path, wal.segments(path)[-1])
+    size = os.path.getsize(log_path)
+    with open(log_path, "ab") as file:
+        file.write(b"\x10\x00\x00\x00garbage")
+
+    assert rows(Database.open(path)) == {"a": [{"id": 1, "x": 1}]}
+    assert os.path.getsize(log_path) == size
+
+
+def test_group_commit(tmpdir):
+    path = str(tmpdir / "db.snapshot")
+    log = wal.WriteAheadLog(Database, path, 1, sync="always")
+
+    def write(n):
+        for i in range(200):
+            log.log(f"t{n}", ("insert", {"id": i}))
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log.close()
+
+    records = list(wal.read_segment(wal.segment_path(path, 1)))
+    assert len(records) == 800
+    assert [r[2]["id"] for r in records if r[0] == "t3"] == list(range(200))
+
+
+def test_invalid_sync_mode(tmpdir):
+    with pytest.raises(ValueError, match="Unknown sync mode"):
+        Database.open(str(tmpdir / "db.snapshot"), sync="sometimes")
+
+
+def test_rows_with_different_keys(tmpdir):
+    path = str(tmpdir / "db.snapshot")
+    db = Database.open(path, sync="always")
+    db["t"].insert_many([{"a": 1}, {"b": 2}])
+    db["t"].upsert_many([{"a": 1, "c": 3}, {"b": 5, "a": 4}], keys=["a"])
+    db.close()
+
+    assert rows(Database.open(path)) == rows(db)
+    assert len(rows(db)["t"]) == 3
+
+
+def test_save_to_own_snapshot(tmpdir):
+    path = str(tmpdir / "db.snapshot")
+    db = Database.open(path)
+    change_everything(db)
+    db.save(path)
+    db["a"].insert({"x": 1000})
+    db.close()
+
+    assert rows(Database.open(path)) == rows(db)
+
+
+def test_save_during_compaction(tmpdir):
+    path = str(tmpdir / "db.snapshot")
+    db = Database.open(path, sync="never")
+    db["a"].insert({"x": 1})
+    # stands in for a compaction that rotated before the next insert
+    release = threading.Event()
+    running = threading.Thread(target=release.wait)
+    running.start()
+    db._wal._compaction = running
+    threading.Timer(0.05, release.set).start()
+    db["a"].insert({"x": 2})
+    db.save(path)
+
+    assert rows(Database.load(path)) == rows(db)
+    db.close()
+
+
+@pytest.mark.parametrize("thread_safe", [True, False])
+def test_open_thread_safe(tmpdir, thread_safe):
+    path = str(tmpdir / "db.snapshot")
+    db = Database.open(path, thread_safe=thread_safe)
+    db["a"].insert({"x": 1})
+    db.compact().join()
+    db["b"].insert({"x": 2})
+    db.close()
+
+    reopened = Database.open(path, thread_safe=thread_safe)
+    assert reopened.thread_safe == thread_safe
+    assert [reopened[name]._lock is not None for name in ["a", "b"]] == [
+        thread_safe, thread_safe]
+    assert (Database.load(path, thread_safe=thread_safe)["a"]._lock
+            is not None) == thread_safe